@@ -0,0 +1,110 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Counts the database round trips of a burst of lookups, with and without batching.
+
+    python -m benchmarks.batch_loader --commands 2000 --users 300 --latency 2
+
+A burst of ``bank`` lookups arrives over a few loop iterations, like when
+many messages are dispatched at once. The stand-in pool answers after a
+fixed latency and counts every query it receives.
+"""
+
+import time
+import random
+import asyncio
+import argparse
+
+from utils import queries
+from utils.loader import BatchLoader
+
+# what the lookups looked like before batching, it's not registered as the bot doesn't use it
+BANK_GET_ONE = queries.Query('bank_get_one', 'SELECT user_id, pearkies FROM currency WHERE user_id = $1')
+
+
+class CountingPool:
+    """Answers the bank queries after a fixed latency, counting round trips."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.round_trips = 0
+
+    async def fetch(self, query, user_ids, **kwargs):
+        assert '= ANY($1' in str(query) and isinstance(user_ids, list)
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+        return [{'user_id': user_id, 'pearkies': user_id % 100} for user_id in user_ids]
+
+    async def fetchrow(self, query, user_id, **kwargs):
+        assert str(query).endswith('= $1') and isinstance(user_id, int)
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+        return {'user_id': user_id, 'pearkies': user_id % 100}
+
+
+async def burst(pool: CountingPool, user_ids: list, waves: int, *, batched: bool) -> float:
+    loader = BatchLoader(pool, queries.BANK_GET)
+
+    async def lookup(user_id: int):
+        if batched:
+            return await loader.load(user_id)
+        return await pool.fetchrow(BANK_GET_ONE, user_id)
+
+    async def wave(ids: list):
+        await asyncio.gather(*map(lookup, ids))
+
+    started = time.perf_counter()
+    size = -(-len(user_ids) // waves)
+    tasks = []
+
+    # each wave starts on its own loop iteration, like messages read from different gateway frames
+    for index in range(0, len(user_ids), size):
+        tasks.append(asyncio.ensure_future(wave(user_ids[index:index + size])))
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commands', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=300, help='distinct users in the burst')
+    parser.add_argument('--waves', type=int, default=20, help='loop iterations the burst is spread over')
+    parser.add_argument('--latency', type=float, default=2.0, help='query latency in milliseconds')
+    args = parser.parse_args()
+
+    random.seed(0)
+    user_ids = [random.randint(1, args.users) for _ in range(args.commands)]
+
+    for batched in (False, True):
+        pool = CountingPool(args.latency / 1000)
+        elapsed = asyncio.get_event_loop().run_until_complete(burst(pool, user_ids, args.waves, batched=batched))
+
+        mode = 'batched' if batched else 'per lookup'
+        print(f'{mode}: {pool.round_trips} round trips, {elapsed * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
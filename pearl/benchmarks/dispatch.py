@@ -0,0 +1,182 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Measures how many messages per second go through the command dispatch.
+
+    python -m benchmarks.dispatch --compare
+    python -m benchmarks.dispatch --loop uvloop --messages 50000
+
+Synthetic messages are fed to ``Pearl.process_commands``, with a share of
+them invoking the ``prefix`` command, which answers through
+``Context.send``. Postgres and Discord's HTTP API are replaced by local
+stand-ins, so only Pearl's and discord.py's own work is measured.
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+
+GUILDS = 50
+CHANNELS_PER_GUILD = 2
+
+
+class FakePool:
+    """Answers the prefix queries without a database."""
+
+    async def fetch(self, query, *args, **kwargs):
+        return [{'guild_id': guild_id, 'prefix': 'p!'} for guild_id in range(1, GUILDS + 1)]
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return {'prefix': 'p!'}
+
+    async def fetchval(self, query, *args, **kwargs):
+        return 'p!'
+
+    async def execute(self, query, *args, **kwargs):
+        return 'OK'
+
+
+def user_payload(user_id: int, *, bot: bool = False) -> dict:
+    return {'id': str(user_id), 'username': f'user{user_id}', 'discriminator': '0001', 'avatar': None, 'bot': bot}
+
+
+def message_payload(message_id: int, channel_id: int, guild_id: int, author: dict, content: str) -> dict:
+    return {
+        'id': str(message_id),
+        'channel_id': str(channel_id),
+        'guild_id': str(guild_id),
+        'author': author,
+        'member': {'roles': [], 'joined_at': '2020-11-05T12:00:00.000000+00:00', 'nick': None},
+        'content': content,
+        'timestamp': '2020-11-05T12:00:00.000000+00:00',
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0
+    }
+
+
+def create_bot():
+    import discord
+
+    from pearl import Pearl
+    from utils.prefixes import PrefixCache
+    from utils.ratelimit import RateLimiter
+
+    bot = Pearl()
+    state = bot._connection
+    state.user = discord.ClientUser(state=state, data=user_payload(1, bot=True))
+
+    bot.pool = FakePool()
+    bot.prefixes = PrefixCache(bot.pool)
+
+    # synthetic traffic comes from a handful of authors, don't throttle them
+    bot.user_ratelimit = RateLimiter({None: (10 ** 9, 1.0)})
+    bot.guild_ratelimit = RateLimiter({None: (10 ** 9, 1.0)})
+
+    channels = []
+    for guild_id in range(1, GUILDS + 1):
+        channel_data = [
+            {'id': str(guild_id * 100 + index), 'name': f'chat-{index}', 'type': 0, 'position': index}
+            for index in range(CHANNELS_PER_GUILD)
+        ]
+
+        guild = discord.Guild(data={'id': str(guild_id), 'name': f'guild-{guild_id}', 'channels': channel_data}, state=state)
+        state._add_guild(guild)
+        channels.extend(guild.text_channels)
+
+    message_ids = iter(range(10 ** 6, 10 ** 9))
+
+    async def send_message(channel_id, content, **kwargs):
+        channel = bot.get_channel(int(channel_id))
+        return message_payload(next(message_ids), channel.id, channel.guild.id, user_payload(1, bot=True), content)
+
+    bot.http.send_message = send_message
+    bot.load_extension('extensions.settings')
+
+    return bot, channels
+
+
+async def run(bot, channels, messages: int, command_ratio: float) -> float:
+    import discord
+
+    bot.setup_dispatch()
+    await bot.prefixes.fill()
+
+    state = bot._connection
+    authors = [user_payload(user_id) for user_id in range(10, 60)]
+    chatter = ['bom dia', 'alguém joga hoje?', 'kkkkkkkk', 'pearl é a melhor bot', 'https://example.com']
+
+    synthetic = []
+    for message_id in range(messages):
+        channel = random.choice(channels)
+        content = 'p!prefix' if random.random() < command_ratio else random.choice(chatter)
+        data = message_payload(message_id + 1, channel.id, channel.guild.id, random.choice(authors), content)
+
+        synthetic.append(discord.Message(state=state, channel=channel, data=data))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bot.process_commands(message) for message in synthetic))
+    elapsed = time.perf_counter() - started
+
+    bot.loop_monitor.stop()
+    return messages / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--loop', choices=('asyncio', 'uvloop'), default='asyncio')
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--commands', type=float, default=0.1, help='fraction of messages which are commands')
+    parser.add_argument('--compare', action='store_true', help='run once per loop implementation')
+    args = parser.parse_args()
+
+    if args.compare:
+        for loop in ('asyncio', 'uvloop'):
+            command = [sys.executable, '-m', 'benchmarks.dispatch', '--loop', loop,
+                       '--messages', str(args.messages), '--commands', str(args.commands)]
+            subprocess.run(command)
+        return
+
+    from pearl import install_event_loop
+
+    random.seed(0)
+    loop = install_event_loop(args.loop)
+
+    bot, channels = create_bot()
+    throughput = bot.loop.run_until_complete(run(bot, channels, args.messages, args.commands))
+
+    print(f'{loop}: {throughput:,.0f} messages/s')
+
+
+if __name__ == '__main__':
+    main()
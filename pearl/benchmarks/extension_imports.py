@@ -0,0 +1,116 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Measures import time and resident memory of every extension.
+
+Each extension is imported in a fresh interpreter so the numbers don't
+leak into each other. Run it from the ``pearl`` directory::
+
+    python -m benchmarks.extension_imports
+    python -m benchmarks.extension_imports --eager
+
+``--eager`` imports the heavy third-party modules up front, which is how
+the extensions behaved before they were imported lazily.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+
+HEAVY_MODULES = ('pyfiglet', 'pygit2', 'lavalink', 'nekos', 'emoji', 'asyncdagpi', 'pkg_resources')
+
+_CHILD = '''
+import sys
+import json
+import time
+import resource
+import importlib
+
+def rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+import discord
+from discord.ext import commands
+
+before = rss()
+started = time.perf_counter()
+
+for name in {eager!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+
+importlib.import_module({extension!r})
+
+elapsed = time.perf_counter() - started
+print(json.dumps({{'time': elapsed, 'rss': rss() - before}}))
+'''
+
+
+def get_extensions():
+    for root, _, items in os.walk('extensions'):
+        for f in sorted(items):
+            if f.endswith('.py'):
+                path = os.path.join(root, os.path.splitext(f)[0])
+                yield re.sub(r'\\|\/', '.', path)
+
+
+def measure(extension: str, *, eager: bool) -> dict:
+    code = _CHILD.format(extension=extension, eager=HEAVY_MODULES if eager else ())
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+
+    if output.returncode:
+        return {'error': output.stderr.strip().splitlines()[-1]}
+
+    return json.loads(output.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--eager', action='store_true', help='import the heavy modules up front')
+    args = parser.parse_args()
+
+    print(f'{"extension":<28} {"import (ms)":>12} {"rss (KiB)":>10}')
+
+    for extension in get_extensions():
+        result = measure(extension, eager=args.eager)
+
+        if 'error' in result:
+            print(f'{extension:<28} {result["error"]}')
+            continue
+
+        print(f'{extension:<28} {result["time"] * 1000:>12.2f} {result["rss"] / 1024:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Measures the time to ready of identifying, resuming and a refused resume.
+
+    python -m benchmarks.gateway_resume --guilds 200 --members 500 --shards 2
+
+A local fake gateway speaks enough of Discord's protocol for discord.py:
+it answers IDENTIFY with READY and a GUILD_CREATE per guild, member chunk
+requests with a single chunk, and RESUME with RESUMED when it knows the
+session or with INVALID_SESSION otherwise. Discord's HTTP API is replaced
+by a stand-in returning the bot user and the gateway's address.
+
+Four Pearl processes are simulated in a row: the first identifies and
+saves its sessions on close, the second resumes them, the third finds one
+shard's session forgotten by the gateway and the fourth finds all of them
+forgotten. ``ready`` must be dispatched exactly once in every case.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+from typing import Tuple
+
+from aiohttp import web
+
+BOT_ID = 1
+
+
+def user_payload(user_id: int, *, bot: bool = False) -> dict:
+    return {'id': str(user_id), 'username': f'user{user_id}', 'discriminator': '0001', 'avatar': None, 'bot': bot}
+
+
+def member_payload(user_id: int) -> dict:
+    return {'user': user_payload(user_id), 'roles': [], 'joined_at': '2020-11-05T12:00:00.000000+00:00', 'nick': None}
+
+
+def guild_id_of(index: int, shard_count: int) -> int:
+    """Returns a snowflake of the index-th guild, spreading guilds over the shards."""
+    return (index << 22) | index % shard_count
+
+
+def guild_shard(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+def guild_payload(guild_id: int, members: int) -> dict:
+    return {
+        'id': str(guild_id),
+        'name': f'guild-{guild_id}',
+        'owner_id': str(BOT_ID + 1),
+        'region': 'brazil',
+        'features': [],
+        'large': True,
+        'member_count': members + 1,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '104324673', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [{'id': str(guild_id + index + 1), 'name': f'chat-{index}', 'type': 0, 'position': index}
+                     for index in range(5)],
+        'emojis': [],
+        'voice_states': [],
+        'presences': [],
+        'members': [member_payload(BOT_ID)]
+    }
+
+
+class FakeGateway:
+    def __init__(self, guilds: int, members: int, shard_count: int):
+        self.members = members
+        self.guilds = [guild_payload(guild_id_of(index, shard_count), members) for index in range(1, guilds + 1)]
+        self.sessions = {}
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        sequence = 0
+
+        async def dispatch(event: str, data: dict) -> None:
+            nonlocal sequence
+            sequence += 1
+            await ws.send_str(json.dumps({'op': 0, 't': event, 's': sequence, 'd': data}))
+
+        await ws.send_str(json.dumps({'op': 10, 'd': {'heartbeat_interval': 41250}, 's': None, 't': None}))
+
+        async for msg in ws:
+            payload = json.loads(msg.data)
+            op, data = payload['op'], payload['d']
+
+            if op == 1:
+                await ws.send_str(json.dumps({'op': 11, 'd': None, 's': None, 't': None}))
+            elif op == 2:
+                shard_id, shard_count = data['shard']
+                guilds = [guild for guild in self.guilds if guild_shard(int(guild['id']), shard_count) == shard_id]
+
+                session_id = uuid.uuid4().hex
+                self.sessions[session_id] = shard_id
+
+                await dispatch('READY', {
+                    'v': 6,
+                    'user': user_payload(BOT_ID, bot=True),
+                    'guilds': [{'id': guild['id'], 'unavailable': True} for guild in guilds],
+                    'session_id': session_id,
+                    'shard': [shard_id, shard_count],
+                    'private_channels': []
+                })
+                for guild in guilds:
+                    await dispatch('GUILD_CREATE', guild)
+            elif op == 6:
+                if data['session_id'] in self.sessions:
+                    sequence = data['seq']
+                    await dispatch('RESUMED', {})
+                else:
+                    await ws.send_str(json.dumps({'op': 9, 'd': False, 's': None, 't': None}))
+            elif op == 8:
+                user_ids = range(int(data['guild_id']) + 10 ** 6, int(data['guild_id']) + 10 ** 6 + self.members)
+                await dispatch('GUILD_MEMBERS_CHUNK', {
+                    'guild_id': data['guild_id'],
+                    'members': [member_payload(user_id) for user_id in user_ids],
+                    'chunk_index': 0,
+                    'chunk_count': 1,
+                    'nonce': data.get('nonce')
+                })
+
+        return ws
+
+
+async def time_to_ready(url: str, shard_count: int, settle: float) -> Tuple[float, int]:
+    from pearl import Pearl
+
+    bot = Pearl(shard_count=shard_count)
+    bot._boot_started = time.perf_counter()
+
+    readies = 0
+
+    async def on_ready():
+        nonlocal readies
+        readies += 1
+
+    bot.add_listener(on_ready)
+
+    async def request(route, **kwargs):
+        if route.path == '/users/@me':
+            return user_payload(BOT_ID, bot=True)
+        if route.path == '/gateway':
+            return {'url': url}
+        raise RuntimeError(f'unexpected request to {route.path}')
+
+    bot.http.request = request
+
+    started = time.perf_counter()
+    await bot.login('token')
+    connection = asyncio.ensure_future(bot.connect(reconnect=True))
+
+    await bot.wait_until_ready()
+    elapsed = time.perf_counter() - started
+
+    # long enough for a late, second ready to show up
+    await asyncio.sleep(settle)
+    assert readies == 1, f'ready was dispatched {readies} times'
+    users = len(bot.users)
+
+    await bot.close()
+    await connection
+
+    return elapsed, users
+
+
+async def run(guilds: int, members: int, shard_count: int, settle: float) -> None:
+    import config
+
+    gateway = FakeGateway(guilds, members, shard_count)
+    app = web.Application()
+    app.router.add_get('/', gateway.handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+
+    port = site._server.sockets[0].getsockname()[1]
+    url = f'ws://127.0.0.1:{port}/'
+
+    with tempfile.TemporaryDirectory() as directory:
+        config.gateway_resume = True
+        config.gateway_session_file = os.path.join(directory, 'gateway-{cluster}.json')
+
+        elapsed, users = await time_to_ready(url, shard_count, settle)
+        print(f'identify: {elapsed:.2f}s to ready, {users} users after settling')
+
+        elapsed, users = await time_to_ready(url, shard_count, settle)
+        print(f'resume: {elapsed:.2f}s to ready, {users} users after settling')
+
+        if shard_count > 1:
+            forgotten = next(session for session, shard_id in gateway.sessions.items() if shard_id == 0)
+            del gateway.sessions[forgotten]
+
+            elapsed, users = await time_to_ready(url, shard_count, settle)
+            print(f'resume with shard 0 refused: {elapsed:.2f}s to ready, {users} users after settling')
+
+        gateway.sessions.clear()
+        elapsed, users = await time_to_ready(url, shard_count, settle)
+        print(f'refused resume: {elapsed:.2f}s to ready, {users} users after settling')
+
+    await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guilds', type=int, default=200)
+    parser.add_argument('--members', type=int, default=500, help='members per guild, sent when chunking')
+    parser.add_argument('--shards', type=int, default=2)
+    parser.add_argument('--settle', type=float, default=10.0,
+                        help='seconds to wait after ready for a duplicate one, identifies are 5s apart')
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(run(args.guilds, args.members, args.shards, args.settle))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Compares the JSON backends on payloads shaped like Pearl's.
+
+    python -m benchmarks.json_codec
+"""
+
+import timeit
+
+from utils import fastjson
+
+
+PAYLOADS = {
+    'random.cat': {'file': 'https://purr.objects-us-east-1.dream.io/i/20161003_103032.jpg'},
+    'random.dog': {'fileSizeBytes': 1502831, 'url': 'https://random.dog/4b0bc8f4-0f0b-4bbe-9b48-b8bfb1c2c8b4.jpg'},
+    'jsonb row': {'guild_id': 758456467324928011, 'prefix': 'p!', 'options': {'dj': None, 'volume': 100, 'locale': 'pt_BR'}},
+    'lavalink tracks': {
+        'loadType': 'SEARCH_RESULT',
+        'playlistInfo': {},
+        'tracks': [
+            {
+                'track': 'QAAAjQIAJVJpY2sgQXN0bGV5IC0gTmV2ZXIgR29ubmEgR2l2ZSBZb3UgVXAADlJpY2tBc3RsZXlWRVZPAAAAAAADPCAAC2RRdzR3OVdnWGNRAAEAK2h0dHBzOi8vd3d3LnlvdXR1YmUuY29tL3dhdGNoP3Y9ZFF3NHc5V2dYY1EAB3lvdXR1YmUAAAAAAAAAAA==',
+                'info': {
+                    'identifier': f'dQw4w9WgXc{i}',
+                    'isSeekable': True,
+                    'author': 'RickAstleyVEVO',
+                    'length': 212000,
+                    'isStream': False,
+                    'position': 0,
+                    'title': 'Rick Astley - Never Gonna Give You Up (Official Music Video)',
+                    'uri': f'https://www.youtube.com/watch?v=dQw4w9WgXc{i}'
+                }
+            } for i in range(10)
+        ]
+    }
+}
+
+
+def main() -> None:
+    backends = []
+    for name in ('json', 'ujson', 'orjson'):
+        try:
+            backends.append(fastjson.get_codec(name))
+        except ValueError:
+            print(f'{name} is not installed, skipping')
+
+    print(f'{"payload":<16} {"backend":<8} {"dumps (µs)":>11} {"loads (µs)":>11}')
+
+    for payload_name, payload in PAYLOADS.items():
+        for name, dumps, loads in backends:
+            encoded = dumps(payload)
+
+            number = 20000
+            dumps_time = timeit.timeit(lambda: dumps(payload), number=number) / number
+            loads_time = timeit.timeit(lambda: loads(encoded), number=number) / number
+
+            print(f'{payload_name:<16} {name:<8} {dumps_time * 1e6:>11.2f} {loads_time * 1e6:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
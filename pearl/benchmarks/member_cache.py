@@ -0,0 +1,135 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Compares the member cache's memory with and without the lean mode.
+
+    python -m benchmarks.member_cache --guilds 1000 --members 250 --active 0.05
+
+Real ``discord.Member`` objects are built from synthetic payloads. The full
+mode caches every member of every guild, like chunking does, while the lean
+mode only keeps the active members which fit in the LRU.
+"""
+
+import gc
+import random
+import weakref
+import argparse
+import tracemalloc
+from typing import Tuple
+
+import discord
+
+from utils.members import MemberLRU
+
+
+class FakeState:
+    self_id = 0
+
+    def __init__(self):
+        self._users = weakref.WeakValueDictionary()
+
+    def store_user(self, data: dict) -> discord.User:
+        user_id = int(data['id'])
+        try:
+            return self._users[user_id]
+        except KeyError:
+            user = self._users[user_id] = discord.User(state=self, data=data)
+            return user
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, state: FakeState):
+        self.id = guild_id
+        self._state = state
+        self._members = {}
+        self._voice_states = {}
+
+    def _add_member(self, member: discord.Member) -> None:
+        self._members[member.id] = member
+
+    def _remove_member(self, member: discord.abc.Snowflake) -> None:
+        self._members.pop(member.id, None)
+
+
+def member_payload(member_id: int) -> dict:
+    return {
+        'user': {
+            'id': str(member_id),
+            'username': f'user{member_id}',
+            'discriminator': f'{member_id % 9999 + 1:04}',
+            'avatar': 'a' * 32
+        },
+        'roles': [str(random.getrandbits(60)) for _ in range(3)],
+        'joined_at': '2020-11-05T12:00:00.000000+00:00',
+        'nick': None
+    }
+
+
+def measure(guilds: int, members: int, active: float, capacity: int, *, lean: bool) -> Tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+
+    state = FakeState()
+    all_guilds = [FakeGuild(guild_id, state) for guild_id in range(guilds)]
+    lru = MemberLRU(capacity)
+
+    for guild in all_guilds:
+        for index in range(members):
+            member_id = guild.id * members + index + 1
+
+            if lean and random.random() > active:
+                continue
+
+            member = discord.Member(data=member_payload(member_id), guild=guild, state=state)
+
+            if lean:
+                lru.touch(member)
+            else:
+                guild._add_member(member)
+
+    cached = sum(len(guild._members) for guild in all_guilds)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return cached, current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guilds', type=int, default=1000)
+    parser.add_argument('--members', type=int, default=250, help='average members per guild')
+    parser.add_argument('--active', type=float, default=0.05, help='fraction of members seen recently')
+    parser.add_argument('--capacity', type=int, default=10000, help='size of the lean LRU')
+    args = parser.parse_args()
+
+    for lean in (False, True):
+        random.seed(0)
+        cached, memory = measure(args.guilds, args.members, args.active, args.capacity, lean=lean)
+
+        mode = 'lean' if lean else 'full'
+        print(f'{mode}: {cached} members cached, {memory / 1024 / 1024:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Measures how many raw gateway events per second Pearl dispatches.
+
+    python -m benchmarks.raw_events --events 100000
+
+A mix of raw payloads, mostly messages, presences and typing, goes
+through ``Pearl.dispatch('socket_response', ...)`` as discord.py does for
+every gateway event. A stand-in for Lavalink's voice handler is attached
+either as an ``on_socket_response`` listener, which runs for every event,
+or as a raw listener, which only runs for voice events. Every scheduled
+listener is awaited before the time is taken.
+"""
+
+import time
+import random
+import asyncio
+import argparse
+
+EVENT_MIX = {
+    'MESSAGE_CREATE': 0.55,
+    'PRESENCE_UPDATE': 0.25,
+    'TYPING_START': 0.1,
+    'GUILD_MEMBER_UPDATE': 0.05,
+    'MESSAGE_REACTION_ADD': 0.03,
+    'VOICE_STATE_UPDATE': 0.015,
+    'VOICE_SERVER_UPDATE': 0.005
+}
+
+
+class FakeLavalink:
+    """Does what Lavalink's handler does with the payloads: ignores most of them."""
+
+    def __init__(self):
+        self.handled = 0
+
+    async def voice_update_handler(self, data: dict) -> None:
+        if not data or 't' not in data:
+            return
+
+        if data['t'] in ('VOICE_SERVER_UPDATE', 'VOICE_STATE_UPDATE'):
+            self.handled += 1
+
+
+def create_payloads(count: int) -> list:
+    events, weights = zip(*EVENT_MIX.items())
+    names = random.choices(events, weights=weights, k=count)
+    return [{'op': 0, 's': sequence, 't': name, 'd': {'guild_id': '1'}} for sequence, name in enumerate(names, start=1)]
+
+
+async def run(payloads: list, *, routed: bool) -> float:
+    from pearl import Pearl
+
+    bot = Pearl()
+    lavalink = FakeLavalink()
+
+    if routed:
+        bot.add_raw_listener(lavalink.voice_update_handler, 'VOICE_STATE_UPDATE', 'VOICE_SERVER_UPDATE')
+    else:
+        bot.add_listener(lavalink.voice_update_handler, 'on_socket_response')
+
+    current = asyncio.current_task()
+    started = time.perf_counter()
+
+    for msg in payloads:
+        bot.dispatch('socket_response', msg)
+
+    pending = [task for task in asyncio.all_tasks() if task is not current]
+    await asyncio.gather(*pending)
+
+    elapsed = time.perf_counter() - started
+    assert lavalink.handled == sum(msg['t'].startswith('VOICE') for msg in payloads)
+
+    return len(payloads) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--loop', choices=('asyncio', 'uvloop'), default='asyncio')
+    args = parser.parse_args()
+
+    from pearl import install_event_loop
+
+    random.seed(0)
+    payloads = create_payloads(args.events)
+    install_event_loop(args.loop)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    for routed in (False, True):
+        throughput = loop.run_until_complete(run(payloads, routed=routed))
+
+        mode = 'raw listener' if routed else 'on_socket_response'
+        print(f'{mode}: {throughput:,.0f} events/s')
+
+
+if __name__ == '__main__':
+    main()
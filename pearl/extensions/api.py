@@ -48,13 +48,21 @@ DEALINGS IN THE SOFTWARE.
 import zlib
 import re
 import os
+import functools
 import discord
 from typing import Optional, Dict
 from io import BytesIO
 
 from discord.ext import commands
 
-from utils import fuzzy
+from utils import fuzzy, http
+from utils.cache import Cache
+
+
+RTFM_PAGES = {
+    'latest': 'https://discordpy.readthedocs.io/en/latest',
+    'python': 'https://docs.python.org/3'
+}
 
 
 class SphinxReader:
@@ -90,80 +98,91 @@ class SphinxReader:
                 position = buffer.find(b'\n')
 
 
-class API(commands.Cog):
-    """Comandos relacionados ao `discord.py`."""
+def parse_inv_objects(buffer: bytes, url: str) -> Dict[str, str]:
+    # a plain function so it can be pickled and run in the process pool
+    stream = SphinxReader(buffer)
+    result = {}
+    inv_version = stream.readline().rstrip()
 
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
+    if inv_version != '# Sphinx inventory version 2':
+        raise RuntimeError('Invalid objects.inv file version.')
+
+    project_name = stream.readline().rstrip()[11:]
+    version = stream.readline().rstrip()[11:]
+
+    line = stream.readline()
+    if 'zlib' not in line:
+        raise RuntimeError('Invalid objects.inv file, not z-lib compatible.')
+
+    entry_regex = re.compile(r'(?x)(.+?)\s+(\S*:\S*)\s+(-?\d+)\s+(\S+)\s+(.*)')
+    for line in stream.read_compressed_lines():
+        match = entry_regex.match(line.rstrip())
+        if not match:
+            return
 
-    def parse_inv_objects(self, stream: SphinxReader, url: str):
-        result = {}
-        inv_version = stream.readline().rstrip()
+        name, directive, prio, location, disp_name = match.groups()
+        domain, _, subdirective = directive.partition(':')
 
-        if inv_version != '# Sphinx inventory version 2':
-            raise RuntimeError('Invalid objects.inv file version.')
+        if directive == 'py:module' and name in result:
+            continue
 
-        project_name = stream.readline().rstrip()[11:]
-        version = stream.readline().rstrip()[11:]
+        if directive == 'std:doc':
+            subdirective = 'label'
 
-        line = stream.readline()
-        if 'zlib' not in line:
-            raise RuntimeError('Invalid objects.inv file, not z-lib compatible.')
+        if location.endswith('$'):
+            location = location[:-1] + name
 
-        entry_regex = re.compile(r'(?x)(.+?)\s+(\S*:\S*)\s+(-?\d+)\s+(\S+)\s+(.*)')
-        for line in stream.read_compressed_lines():
-            match = entry_regex.match(line.rstrip())
-            if not match:
-                return
+        key = name if disp_name == '-' else disp_name
+        prefix = f'{subdirective}:' if domain == 'std' else ''
 
-            name, directive, prio, location, disp_name = match.groups()
-            domain, _, subdirective = directive.partition(':')
+        if project_name == 'discord.py':
+            key = key.replace('discord.ext.commands.', '').replace('discord.', '')
 
-            if directive == 'py:module' and name in result:
-                continue
+        result[f'{prefix}{key}'] = os.path.join(url, location)
 
-            if directive == 'std:doc':
-                subdirective = 'label'
+    return result
 
-            if location.endswith('$'):
-                location = location[:-1] + name
 
-            key = name if disp_name == '-' else disp_name
-            prefix = f'{subdirective}:' if domain == 'std' else ''
+class API(commands.Cog):
+    """Comandos relacionados ao `discord.py`."""
 
-            if project_name == 'discord.py':
-                key = key.replace('discord.ext.commands.', '').replace('discord.', '')
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.rtfm_cache = Cache('rtfm', ttl=86400.0)
 
-            result[f'{prefix}{key}'] = os.path.join(url, location)
+        bot.snapshots.register('rtfm', self.dump_rtfm, max_age=86400.0, key=lambda: RTFM_PAGES)
 
-        return result
+    def cog_unload(self):
+        self.bot.snapshots.unregister('rtfm')
 
-    async def build_rtfm(self, pages: Dict[str, str]) -> None:
-        cache = {}
-        for key, page in pages.items():
-            cache[key] = {}
+    def dump_rtfm(self) -> Optional[Dict[str, Dict[str, str]]]:
+        return dict(self.rtfm_cache.items()) or None
 
-            async with self.bot.session.get(page + '/objects.inv') as response:
-                if response.status != 200:
-                    raise RuntimeError('Cannot build RTFM lookup table, try again later')
+    async def load_inventory(self, page: str) -> Dict[str, str]:
+        response = await http.request(self.bot.session, 'GET', page + '/objects.inv')
+        if response.status != 200:
+            raise RuntimeError('Cannot build RTFM lookup table, try again later')
 
-                stream = SphinxReader(await response.read())
-                cache[key] = self.parse_inv_objects(stream, page)
+        buffer = await response.read()
+        return await self.bot.offload.run_cpu(parse_inv_objects, buffer, page)
 
-            self._rtfm_cache = cache
+    async def get_inventory(self, ctx: commands.Context, key: str) -> Dict[str, str]:
+        if key not in self.rtfm_cache:
+            # the snapshot is only there on the first lookup after a restart
+            snapshot = self.bot.snapshots.restore('rtfm') or {}
+            for name, inventory in snapshot.items():
+                self.rtfm_cache.set(name, inventory)
 
-    async def do_rtfm(self, ctx: commands.Context, query: Optional[str], key: str) -> None:
-        pages = {
-            'latest': 'https://discordpy.readthedocs.io/en/latest',
-            'python': 'https://docs.python.org/3'
-        }
+        if key not in self.rtfm_cache:
+            await ctx.trigger_typing()
+
+        return await self.rtfm_cache.get_or_load(key, functools.partial(self.load_inventory, RTFM_PAGES[key]))
 
+    async def do_rtfm(self, ctx: commands.Context, query: Optional[str], key: str) -> None:
         if not query:
-            return await ctx.send(pages[key])
+            return await ctx.send(RTFM_PAGES[key])
 
-        if not hasattr(self, '_rtfm_cache'):
-            await ctx.trigger_typing()
-            await self.build_rtfm(pages)
+        inventory = await self.get_inventory(ctx, key)
 
         query = re.sub(r'^(?:discord\.(?:ext\.)?)?(?:commands\.)?(.+)', r'\1', query)
 
@@ -177,8 +196,7 @@ class API(commands.Cog):
                     query = f'abc.Messageable.{name}'
                     break
 
-        cache = list(self._rtfm_cache[key].items())
-        matches = fuzzy.finder(query, cache, key=lambda item: item[0], lazy=False)[:8]
+        matches = fuzzy.finder(query, list(inventory.items()), key=lambda item: item[0], lazy=False)[:8]
 
         if len(matches) == 0:
             return await ctx.send('Nada encontrado, você digitou corretamente?')
@@ -27,6 +27,8 @@ import random
 import discord
 from discord.ext import commands
 
+from utils import queries
+
 
 class Currency(commands.Cog, name='Monetário'):
     """Comandos relacionados ao sistema monetário."""
@@ -37,16 +39,14 @@ class Currency(commands.Cog, name='Monetário'):
     async def insert_into(self, ctx: commands.Context, *, member: discord.Member = None) -> None:
         member = member or ctx.author
 
-        query = 'INSERT INTO currency (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING'
-        await ctx.pool.execute(query, member.id)
+        await ctx.pool.execute(queries.BANK_INSERT, member.id)
 
     @commands.command()
     async def bank(self, ctx: commands.Context, *, member: discord.Member = None):
         member = member or ctx.author
         await self.insert_into(ctx, member=member)
 
-        query = 'SELECT pearkies FROM currency WHERE user_id = $1'
-        fetch = await ctx.pool.fetchrow(query, member.id)
+        fetch = await ctx.pool.load(queries.BANK_GET, member.id)
 
         pearkies = fetch['pearkies']
         word = 'Você' if member == ctx.author else member.mention
@@ -62,8 +62,7 @@ class Currency(commands.Cog, name='Monetário'):
         pearkies = random.randint(20, 50)
         word = 'Você' if member == ctx.author else member.mention
 
-        query = 'UPDATE currency SET pearkies = pearkies + $2 WHERE user_id = $1'
-        await ctx.pool.execute(query, member.id, pearkies)
+        await ctx.pool.execute(queries.BANK_ADD, member.id, pearkies)
 
         await ctx.send(f'{word} recebeu {pearkies} {ctx.constants.pearkies_emoji}.')
 
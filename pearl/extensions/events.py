@@ -27,8 +27,8 @@ from datetime import timedelta
 import discord
 import humanize
 from discord.ext import commands
-from pyfiglet import FontNotFound, FigletFont
 
+from utils import queries
 from utils.errors import *
 
 
@@ -41,18 +41,25 @@ class Events(commands.Cog):
         precise_delta = humanize.precisedelta(delta)        
         return f'Espere **{precise_delta}** para usar este comando novamente.'
 
+    def get_ratelimit_message(self, ctx: commands.Context, error: RateLimited) -> str:
+        delta = timedelta(seconds=max(int(error.retry_after), 1))
+        precise_delta = humanize.precisedelta(delta)
+        return f'Você está usando comandos rápido demais, espere **{precise_delta}**.'
+
     def show_valid_fonts(self, ctx: commands.Context, error: commands.CommandError) -> str:
         return f'Esta não é uma fonte válida. Digite `{ctx.prefix}ascii fonts` para saber as fontes disponíveis.'
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
-        query = 'INSERT INTO settings (guild_id) VALUES ($1)'
-        await self.bot.pool.execute(query, guild.id)
+        prefix = await self.bot.pool.fetchval(queries.PREFIX_INSERT, guild.id)
+        self.bot.prefixes.set(guild.id, prefix)
+        await self.bot.invalidator.notify('settings', guild.id)
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild: discord.Guild):
-        query = 'DELETE FROM settings WHERE guild_id = $1'
-        await self.bot.pool.execute(query, guild.id)
+        await self.bot.pool.execute(queries.SETTINGS_DELETE, guild.id)
+        self.bot.prefixes.remove(guild.id)
+        await self.bot.invalidator.notify('settings', guild.id)
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx: commands.Context, error: commands.CommandError):
@@ -77,9 +84,14 @@ class Events(commands.Cog):
             InvalidValueIndex: 'Você digitou um valor inválido.',
             InvalidMusicIndex: 'Esta lista não possui este índice.',
             commands.CommandOnCooldown: self.get_cooldown_message,
+            RateLimited: self.get_ratelimit_message,
+            Overloaded: 'Estou sobrecarregada agora, tente novamente daqui a pouco.',
+            JobTimeout: 'Isso demorou demais, tente novamente daqui a pouco.',
+            DatabaseUnavailable: 'Meu banco de dados está indisponível agora, tente novamente daqui a pouco.',
             BotNotPlaying: 'Eu não estou tocando nenhuma música.',
+            NodeUnavailable: 'Meu servidor de música ainda está conectando, tente novamente daqui a pouco.',
             commands.BadArgument: 'Argumento inválido.',
-            FontNotFound: self.show_valid_fonts,
+            InvalidFont: self.show_valid_fonts,
             MemberIsAuthor: 'Você não pode fazer isso em si mesmo.',
             MemberIsBot: 'Tenho certeza que este bot não fez nada errado.'
         }
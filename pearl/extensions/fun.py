@@ -23,18 +23,42 @@ SOFTWARE.
 '''
 
 import random
-from typing import Union
+import functools
+import importlib.metadata
+from io import BytesIO
+from typing import Union, FrozenSet, List, Tuple
 
 import discord
-import emoji
 from discord.ext import commands
-from pyfiglet import Figlet, FigletFont
-from asyncdagpi import ImageFeatures
 
-from utils.errors import ResponseError
+from utils import fastjson, http, queries
+from utils.cache import Cache
+from utils.errors import ResponseError, InvalidFont
+from utils.lazy import lazy_import
 
+emoji = lazy_import('emoji')
+pyfiglet = lazy_import('pyfiglet')
+asyncdagpi = lazy_import('asyncdagpi')
 
-_ALL_EMOJIS = list(emoji.EMOJI_UNICODE.values())
+
+@functools.lru_cache(maxsize=None)
+def all_emojis() -> FrozenSet[str]:
+    return frozenset(emoji.EMOJI_UNICODE.values())
+
+
+@functools.lru_cache(maxsize=32)
+def get_figlet(font: str) -> 'pyfiglet.Figlet':
+    # parsing a font is most of the work, so each worker keeps the fonts it has used
+    return pyfiglet.Figlet(font=font)
+
+
+def render_figlet(font: str, text: str) -> str:
+    # runs in the process pool, so it must be a plain function
+    return get_figlet(font).renderText(text)
+
+
+def figlet_version() -> str:
+    return importlib.metadata.version('pyfiglet')
 
 
 class Fun(commands.Cog, name='Diversão'):
@@ -42,10 +66,34 @@ class Fun(commands.Cog, name='Diversão'):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._fonts = None
+        self.images = Cache('dagpi', max_bytes=32 * 1024 * 1024, ttl=3600.0, sizeof=lambda image: len(image[0]))
+
+        bot.snapshots.register('fonts', lambda: self._fonts, max_age=7 * 86400.0, key=figlet_version)
+
+    def cog_unload(self):
+        self.bot.snapshots.unregister('fonts')
+
+    def get_fonts(self) -> List[str]:
+        """Returns the figlet fonts, listing them only once."""
+        if self._fonts is None:
+            self._fonts = self.bot.snapshots.restore('fonts') or sorted(pyfiglet.FigletFont.getFonts())
+        return self._fonts
+
+    async def process_image(self, ctx: commands.Context, feature: str, url: str, **kwargs) -> Tuple[discord.File, str]:
+        """Returns a Dagpi image as a file and its name, caching it by its avatars."""
+        async def load() -> Tuple[bytes, str]:
+            image = await ctx.dagpi.image_process(getattr(asyncdagpi.ImageFeatures, feature)(), url, **kwargs)
+            return image.image.getvalue(), image.format
+
+        # avatar URLs carry the avatar's hash, so a new avatar is a new key
+        data, image_format = await self.images.get_or_load((feature, url, *kwargs.values()), load)
+
+        filename = f'{feature}.{image_format}'
+        return discord.File(fp=BytesIO(data), filename=filename), filename
 
     async def get_ship(self, first: discord.Member, second: discord.Member):
-        query = 'SELECT * FROM ships WHERE users = ARRAY[$1, $2]::bigint[]'
-        fetch = await self.bot.pool.fetchrow(query, first.id, second.id)
+        fetch = await self.bot.pool.load(queries.SHIP_GET, (first.id, second.id))
 
         if fetch:
             percentage = fetch['percentage']
@@ -58,36 +106,35 @@ class Fun(commands.Cog, name='Diversão'):
         name = first_half + second_half
         percentage = random.randint(0, 100)
 
-        query = 'INSERT INTO ships VALUES ($1, $2, $3)'
-        await self.bot.pool.execute(query, [first.id, second.id], percentage, name)
+        await self.bot.pool.execute(queries.SHIP_INSERT, [first.id, second.id], percentage, name)
 
         return (name, percentage)
 
     @commands.command(aliases=['randomcat'])
     async def cat(self, ctx: commands.Context):
         """Envia um gif de um gatinho fofo aleatório."""
-        async with ctx.bot.session.get('http://aws.random.cat/meow') as response:
-            if response.status != 200:
-                raise ResponseError()
+        response = await http.request(ctx.bot.session, 'GET', 'http://aws.random.cat/meow')
+        if response.status != 200:
+            raise ResponseError()
 
-            json = await response.json()
-            await ctx.send(image=json['file'])
+        json = await response.json(loads=fastjson.loads)
+        await ctx.send(image=json['file'])
 
     @commands.command(aliases=['randomdog'])
     async def dog(self, ctx: commands.Context):
         """Envia um gif de um cachorrinho fofo aleatório."""
-        async with ctx.bot.session.get('https://random.dog/woof.json') as response:
-            if response.status != 200:
-                raise ResponseError()
+        response = await http.request(ctx.bot.session, 'GET', 'https://random.dog/woof.json')
+        if response.status != 200:
+            raise ResponseError()
 
-            json = await response.json()
-            await ctx.send(image=json['url'])
+        json = await response.json(loads=fastjson.loads)
+        await ctx.send(image=json['url'])
 
     @commands.command(aliases=['sheriff'])
     async def cowboy(self, ctx: commands.Context, target: Union[discord.Emoji, str]):
         """Olá, parceiro! Eu sou um cowboy feito do que você quiser."""
         if isinstance(target, str):
-            if target not in _ALL_EMOJIS:
+            if target not in all_emojis():
                 raise commands.BadArgument()
 
         cowboy = '⠀ ⠀ ⠀  🤠\n　   {0}{0}{0}\n    {0}   {0}　{0}\n   👇   {0}{0} 👇\n  　  {0}　{0}\n　   {0}　 {0}\n　    👢     👢'
@@ -95,15 +142,19 @@ class Fun(commands.Cog, name='Diversão'):
 
     @commands.group(name='ascii', invoke_without_command=True)
     async def ascii_(self, ctx: commands.Context, font: str, *, text: str):
-        figlet = Figlet(font=font)
-        rendered_text = figlet.renderText(text)
+        if font not in self.get_fonts():
+            raise InvalidFont()
+
+        try:
+            rendered_text = await ctx.bot.offload.run_cpu(render_figlet, font, text)
+        except pyfiglet.FontNotFound:
+            raise InvalidFont()
 
         await ctx.send(f'```\n{rendered_text}\n```')
 
     @ascii_.command(name='fonts')
     async def ascii_fonts(self, ctx: commands.Context):
-        all_fonts = FigletFont.getFonts()
-        fonts = [f'`{font}`' for font in all_fonts]
+        fonts = [f'`{font}`' for font in self.get_fonts()]
 
         await ctx.paginate(', '.join(fonts))
 
@@ -112,10 +163,7 @@ class Fun(commands.Cog, name='Diversão'):
         member = member or ctx.author
         
         url = str(member.avatar_url_as(static_format='png', size=1024))
-        image = await ctx.dagpi.image_process(ImageFeatures.wasted(), url)
-
-        filename = f'wasted.{image.format}'
-        file = discord.File(fp=image.image, filename=filename)
+        file, filename = await self.process_image(ctx, 'wasted', url)
 
         await ctx.send(file=file, image=f'attachment://{filename}')
 
@@ -124,10 +172,7 @@ class Fun(commands.Cog, name='Diversão'):
         member = member or ctx.author
         
         url = str(member.avatar_url_as(static_format='png', size=1024))
-        image = await ctx.dagpi.image_process(ImageFeatures.pixel(), url)
-
-        filename = f'pixel.{image.format}'
-        file = discord.File(fp=image.image, filename=filename)
+        file, filename = await self.process_image(ctx, 'pixel', url)
 
         await ctx.send(file=file, image=f'attachment://{filename}')
 
@@ -136,10 +181,7 @@ class Fun(commands.Cog, name='Diversão'):
         member = member or ctx.author
         
         url = str(member.avatar_url_as(static_format='png', size=1024))
-        image = await ctx.dagpi.image_process(ImageFeatures.triggered(), url)
-
-        filename = f'triggered.{image.format}'
-        file = discord.File(fp=image.image, filename=filename)
+        file, filename = await self.process_image(ctx, 'triggered', url)
 
         await ctx.send(file=file, image=f'attachment://{filename}')
 
@@ -148,10 +190,7 @@ class Fun(commands.Cog, name='Diversão'):
         member = member or ctx.author
         
         url = str(member.avatar_url_as(static_format='png', size=1024))
-        image = await ctx.dagpi.image_process(ImageFeatures.invert(), url)
-
-        filename = f'invert.{image.format}'
-        file = discord.File(fp=image.image, filename=filename)
+        file, filename = await self.process_image(ctx, 'invert', url)
 
         await ctx.send(file=file, image=f'attachment://{filename}')
 
@@ -160,10 +199,7 @@ class Fun(commands.Cog, name='Diversão'):
         member = member or ctx.author
         
         url = str(member.avatar_url_as(static_format='png', size=1024))
-        image = await ctx.dagpi.image_process(ImageFeatures.sobel(), url)
-
-        filename = f'sobel.{image.format}'
-        file = discord.File(fp=image.image, filename=filename)
+        file, filename = await self.process_image(ctx, 'sobel', url)
 
         await ctx.send(file=file, image=f'attachment://{filename}')
 
@@ -172,10 +208,7 @@ class Fun(commands.Cog, name='Diversão'):
         member = member or ctx.author
         
         url = str(member.avatar_url_as(static_format='png', size=1024))
-        image = await ctx.dagpi.image_process(ImageFeatures.jail(), url)
-
-        filename = f'jail.{image.format}'
-        file = discord.File(fp=image.image, filename=filename)
+        file, filename = await self.process_image(ctx, 'jail', url)
 
         await ctx.send(file=file, image=f'attachment://{filename}')
 
@@ -185,10 +218,7 @@ class Fun(commands.Cog, name='Diversão'):
         
         member_avatar = str(member.avatar_url_as(static_format='png', size=1024))
         author_avatar = str(author.avatar_url_as(static_format='png', size=1024))
-        image = await ctx.dagpi.image_process(ImageFeatures.why_are_you_gay(), member_avatar, url2=author_avatar)
-
-        filename = f'why_are_you_gay.{image.format}'
-        file = discord.File(fp=image.image, filename=filename)
+        file, filename = await self.process_image(ctx, 'why_are_you_gay', member_avatar, url2=author_avatar)
 
         await ctx.send(file=file, image=f'attachment://{filename}')
 
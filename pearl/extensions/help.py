@@ -47,19 +47,50 @@ DEALINGS IN THE SOFTWARE.
 
 import itertools
 import datetime
-import pkg_resources
+import os
 import sys
-from typing import Mapping, Optional, List
+from typing import Any, Dict, Mapping, Optional, List
 
 import discord
-import pygit2
 import humanize
 from discord.ext import commands
 
 from utils.menus import HelpMenu, BotHelpInterface, GroupHelpInterface
+from utils.lazy import lazy_import
+
+pygit2 = lazy_import('pygit2')
+pkg_resources = lazy_import('pkg_resources')
 
 
 REPO_URL = 'https://github.com/webkaiyo/Pearl'
+GIT_DIR = '../.git'
+
+
+def read_head(git_dir: str = GIT_DIR) -> Optional[str]:
+    """Returns the commit HEAD points to, reading the files instead of loading pygit2."""
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+
+        if not head.startswith('ref: '):
+            return head
+
+        ref = head[5:]
+        ref_path = os.path.join(git_dir, ref)
+
+        if os.path.exists(ref_path):
+            with open(ref_path) as f:
+                return f.read().strip()
+
+        with open(os.path.join(git_dir, 'packed-refs')) as f:
+            for line in f:
+                sha, _, name = line.strip().partition(' ')
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+
+    return None
 
 
 class HelpCommand(commands.HelpCommand):
@@ -126,29 +157,49 @@ class Help(commands.Cog, name='Ajuda'):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._commits = None
 
         self._original_help = bot.help_command
         bot.help_command = HelpCommand()
         bot.help_command.cog = self
 
+        # the commits only change with a deploy, so they're kept while HEAD stays the same
+        bot.snapshots.register('commits', lambda: self._commits, max_age=7 * 86400.0, key=read_head)
+
     def cog_unload(self):
         self.bot.help_command = self._original_help
+        self.bot.snapshots.unregister('commits')
 
-    def format_commit(self, commit: pygit2.Object) -> str:
-        short, _, _ = commit.message.partition('\n')
-        sha2 = commit.hex[0:6]
+    def format_commit(self, commit: Dict[str, Any]) -> str:
+        sha = commit['hex']
+        summary = commit['summary']
         
-        timezone = datetime.timezone(datetime.timedelta(minutes=commit.commit_time_offset))
-        time = datetime.datetime.fromtimestamp(commit.commit_time).astimezone(timezone)
+        timezone = datetime.timezone(datetime.timedelta(minutes=commit['offset']))
+        time = datetime.datetime.fromtimestamp(commit['time']).astimezone(timezone)
         offset = time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
 
         delta = humanize.precisedelta(offset - datetime.datetime.utcnow(), format='%0.0f')
-        return f'[`{sha2}`]({REPO_URL}/commit/{commit.hex}) {short} (há {delta})'
+        return f'[`{sha[0:6]}`]({REPO_URL}/commit/{sha}) {summary} (há {delta})'
+
+    def load_last_commits(self, count: int = 3) -> List[Dict[str, Any]]:
+        repo = pygit2.Repository(GIT_DIR)
+        commits = itertools.islice(repo.walk(repo.head.target, pygit2.GIT_SORT_TOPOLOGICAL), count)
+
+        return [
+            {
+                'hex': commit.hex,
+                'summary': commit.message.partition('\n')[0],
+                'time': commit.commit_time,
+                'offset': commit.commit_time_offset
+            }
+            for commit in commits
+        ]
+
+    def get_last_commits(self) -> str:
+        if self._commits is None:
+            self._commits = self.bot.snapshots.restore('commits') or self.load_last_commits()
 
-    def get_last_commits(self, count: int = 3) -> str:
-        repo = pygit2.Repository('../.git')
-        commits = list(itertools.islice(repo.walk(repo.head.target, pygit2.GIT_SORT_TOPOLOGICAL), count))
-        return '\n'.join(self.format_commit(commit) for commit in commits)
+        return '\n'.join(self.format_commit(commit) for commit in self._commits)
 
     @commands.command()
     async def about(self, ctx: commands.Context):
@@ -167,15 +218,14 @@ class Help(commands.Cog, name='Ajuda'):
                   f'Fui feita pelo `{app_info.owner}` com o intuito de ser útil e fácil de uso.\n' \
                   f'Fui desenvolvida em Python {py_version} com `discord.py v{dpy_version}`.'
 
-        guilds = 0
-        users = len(ctx.bot.users)
+        guilds = ctx.bot.guild_count
+        users = ctx.bot.user_count
 
         text = 0
         voice = 0
         category = 0
 
         for guild in ctx.bot.guilds:
-            guilds += 1
             for channel in guild.channels:
                 if isinstance(channel, discord.TextChannel):
                     text += 1
@@ -29,13 +29,15 @@ from datetime import timedelta
 from async_timeout import timeout
 from typing import Optional
 
-import lavalink
 import humanize
 import discord
 from discord.ext import commands
 
 import config
 from utils.errors import *
+from utils.lazy import lazy_import
+
+lavalink = lazy_import('lavalink')
 
 
 url_regex = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*(),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
@@ -46,26 +48,75 @@ class Music(commands.Cog, name='Música'):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.node_ready = asyncio.Event()
+
+        bot.add_flush_hook(self.disconnect_players)
+        self.bot.loop.create_task(self.connect_lavalink())
+
+    async def connect_lavalink(self) -> None:
+        """Creates the Lavalink client once the bot's user is known."""
+        await self.bot.wait_until_ready()
 
-        if not hasattr(bot, 'lavalink'):
-            bot.lavalink = lavalink.Client(bot.user.id, connect_back=True)
-            bot.lavalink.add_node('127.0.0.1', 2333, config.lavalink, 'br', 'pearl')
-            bot.add_listener(bot.lavalink.voice_update_handler, 'on_socket_response')
+        if not hasattr(self.bot, 'lavalink'):
+            self.bot.lavalink = lavalink.Client(self.bot.user.id, connect_back=True)
+            self.bot.lavalink.add_node('127.0.0.1', 2333, config.lavalink, 'br', 'pearl')
+            self.bot.add_raw_listener(self.bot.lavalink.voice_update_handler, 'VOICE_STATE_UPDATE', 'VOICE_SERVER_UPDATE')
 
         lavalink.add_event_hook(self.track_hook)
 
+        # the client survives reloads, so its node may already be connected
+        if self.bot.lavalink.node_manager.available_nodes:
+            self.node_ready.set()
+
+    async def wait_for_node(self) -> None:
+        """Waits for the Lavalink node to connect, so commands never race it."""
+        if self.node_ready.is_set():
+            return
+
+        try:
+            await asyncio.wait_for(self.node_ready.wait(), timeout=10.0)
+        except asyncio.TimeoutError:
+            raise NodeUnavailable() from None
+
     def cog_unload(self):
-        self.bot.lavalink._event_hooks.clear()
+        self.bot.remove_flush_hook(self.disconnect_players)
+
+        if hasattr(self.bot, 'lavalink'):
+            self.bot.lavalink._event_hooks.clear()
+
+    async def disconnect_players(self) -> None:
+        """Stops every player and leaves their voice channels before shutting down."""
+        if not hasattr(self.bot, 'lavalink'):
+            return
+
+        for guild_id, player in list(self.bot.lavalink.player_manager.players.items()):
+            if not player.is_connected:
+                continue
+
+            still_active = player.fetch('still_active')
+            if still_active is not None:
+                still_active.set()
+
+            player.queue.clear()
+            await player.stop()
+            await self.connect_to(guild_id, None)
 
     def escape_markdown(self, text: str) -> str:
         return discord.utils.escape_markdown(text)
 
-    def has_dj_permissions(self, player: lavalink.DefaultPlayer, ctx: commands.Context) -> bool:
+    def has_dj_permissions(self, player: 'lavalink.DefaultPlayer', ctx: commands.Context) -> bool:
         is_dj = ctx.author.id == player.fetch('dj')
         is_admin = ctx.author.guild_permissions.manage_channels
         return is_dj or is_admin
 
-    async def track_hook(self, event: lavalink.Event) -> None:
+    async def track_hook(self, event: 'lavalink.Event') -> None:
+        if isinstance(event, lavalink.events.NodeConnectedEvent):
+            self.node_ready.set()
+
+        if isinstance(event, lavalink.events.NodeDisconnectedEvent):
+            if not self.bot.lavalink.node_manager.available_nodes:
+                self.node_ready.clear()
+
         if isinstance(event, lavalink.events.QueueEndEvent):
             player = event.player
 
@@ -89,7 +140,8 @@ class Music(commands.Cog, name='Música'):
             ctx = player.fetch('ctx')
             player.fetch('still_active').set()
 
-            requester = ctx.guild.get_member(track.requester).mention or '**[usuário desconhecido]**'
+            member = await self.bot.get_or_fetch_member(ctx.guild, track.requester)
+            requester = member.mention if member else '**[usuário desconhecido]**'
 
             try:
                 duration = humanize.precisedelta(timedelta(milliseconds=track.duration))
@@ -115,6 +167,7 @@ class Music(commands.Cog, name='Música'):
         await ws.voice_state(str(guild_id), channel_id)
 
     async def cog_before_invoke(self, ctx: commands.Context):
+        await self.wait_for_node()
         await self.ensure_voice(ctx)
 
     async def ensure_voice(self, ctx: commands.Context) -> None:
@@ -349,7 +402,8 @@ class Music(commands.Cog, name='Música'):
             raise BotNotPlaying()
 
         title = self.escape_markdown(current.title)
-        requester = ctx.guild.get_member(current.requester).mention or '**[usuário desconhecido]**'
+        member = await ctx.bot.get_or_fetch_member(ctx.guild, current.requester)
+        requester = member.mention if member else '**[usuário desconhecido]**'
 
         try:
             duration = humanize.precisedelta(timedelta(milliseconds=current.duration))
@@ -32,6 +32,7 @@ from typing import Dict, Any
 import discord
 from discord.ext import commands
 
+from utils import queries
 from utils.codeblocks import codeblock_converter
 from utils.repl import ExceptionReactor
 from utils.models import copy_context_with
@@ -100,7 +101,9 @@ class Owner(commands.Cog, name='Desenvolvedores'):
     async def developer_logout(self, ctx: commands.Context):
         """Logs this bot out."""
         await ctx.send('Desligando. Até mais, 👋.')
-        await ctx.bot.logout()
+
+        # closing waits for running commands, this one included, so it can't be awaited here
+        ctx.bot.loop.create_task(ctx.bot.logout())
 
     @developer.command(name='load', aliases=['l', 'reload', 'r'])
     async def developer_load(self, ctx: commands.Context, *extensions: str):
@@ -142,6 +145,42 @@ class Owner(commands.Cog, name='Desenvolvedores'):
 
         await ctx.paginate(paginator.pages)
 
+    @developer.command(name='pool')
+    async def developer_pool(self, ctx: commands.Context):
+        """Shows the pool usage and the slowest statements."""
+        pool = ctx.pool
+        wait = pool.acquire_wait
+
+        content = f'Conexões em uso: **{pool.in_use}** (pico **{pool.peak_in_use}**)\n' \
+                  f'Tamanho máximo: **{pool.max_size}** (limite **{pool.max_limit}**, {pool.resizes} redimensionamentos)\n' \
+                  f'Espera por conexão: p50 **{wait.percentile(50):.2f}ms**, ' \
+                  f'p95 **{wait.percentile(95):.2f}ms**, p99 **{wait.percentile(99):.2f}ms**'
+
+        for name, loader in pool.loaders.items():
+            content += f'\nLotes de `{name}`: **{loader.loads}** buscas em **{loader.batches}** consultas'
+
+        statements = sorted(pool.statements.items(), key=lambda item: item[1].latency.total, reverse=True)
+        lines = [content]
+
+        for key, stats in statements:
+            latency = stats.latency
+            query = queries.registry.get(key)
+
+            if query is not None:
+                header = f'`{query.name}`' + (' (preparado)' if query.prepare else '')
+                key = f'{header}\n```sql\n{query.sql[:200]}```'
+            else:
+                key = f'```sql\n{key[:200]}```'
+
+            lines.append(
+                f'{key}'
+                f'{stats.count} execuções, {stats.errors} erros, '
+                f'p50 {latency.percentile(50):.2f}ms, p95 {latency.percentile(95):.2f}ms, '
+                f'p99 {latency.percentile(99):.2f}ms'
+            )
+
+        await ctx.paginate(lines, per_page=6)
+
     @developer.command(name='su', aliases=['as'])
     async def developer_su(self, ctx: commands.Context, target: discord.Member, *, command):
         ctx = await copy_context_with(ctx, author=target, content=ctx.prefix + command)
@@ -27,6 +27,7 @@ import functools
 import discord
 from discord.ext import commands
 
+from utils import queries
 from utils.errors import *
 
 
@@ -34,8 +35,7 @@ def not_empty():
     def wrapper(func):
         @functools.wraps(func)
         async def wrapped(self, ctx: commands.Context, *args, **kwargs):
-            query = 'SELECT list FROM todos WHERE user_id = $1'
-            fetch = await ctx.pool.fetchrow(query, ctx.author.id)
+            fetch = await ctx.pool.load(queries.TODO_GET, ctx.author.id)
 
             if not fetch['list']:
                 return await ctx.send('Sua lista de afazeres já está vazia, não há nada o que deletar.')
@@ -55,8 +55,7 @@ class Reminders(commands.Cog, name='Lembretes'):
     async def insert_into(self, ctx: commands.Context, *, member: discord.Member = None):
         member = member or ctx.author
 
-        query = 'INSERT INTO todos (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING'
-        await ctx.pool.execute(query, member.id)
+        await ctx.pool.execute(queries.TODO_INSERT, member.id)
 
     @commands.group()
     @commands.before_invoke(insert_into)
@@ -69,8 +68,7 @@ class Reminders(commands.Cog, name='Lembretes'):
         if len(to_do) >= self.limit:
             return await ctx.send(f'Seu afazer não pode ter mais que `{self.limit}` caracteres.')
 
-        query = 'UPDATE todos SET list = array_append(list, $2) WHERE user_id = $1'
-        await ctx.pool.execute(query, ctx.author.id, to_do)
+        await ctx.pool.execute(queries.TODO_APPEND, ctx.author.id, to_do)
 
         await ctx.send(f'Adicionado para sua lista de afazeres: **{to_do}**')
 
@@ -79,8 +77,7 @@ class Reminders(commands.Cog, name='Lembretes'):
         member = member or ctx.author
         await self.insert_into(ctx, member=member)
 
-        query = 'SELECT list FROM todos WHERE user_id = $1'
-        fetch = await ctx.pool.fetchrow(query, member.id)
+        fetch = await ctx.pool.load(queries.TODO_GET, member.id)
 
         values = [f'`{i}.` {value}' for i, value in enumerate(fetch['list'], start=1)]
 
@@ -92,8 +89,7 @@ class Reminders(commands.Cog, name='Lembretes'):
     @todo.command(name='remove', aliases=['delete'])
     @not_empty()
     async def todo_remove(self, ctx: commands.Context, index: int):
-        query = 'SELECT list FROM todos WHERE user_id = $1'
-        fetch = await ctx.pool.fetchrow(query, ctx.author.id)
+        fetch = await ctx.pool.load(queries.TODO_GET, ctx.author.id)
 
         indexes = dict(enumerate(fetch['list'], start=1))
         value = indexes.get(index, None)
@@ -101,12 +97,7 @@ class Reminders(commands.Cog, name='Lembretes'):
         if not value:
             return await ctx.send(f'Não há um ID `{index}` na sua lista.')
 
-        query = '''
-            UPDATE todos
-                SET list = list[:$2 - 1] || list[$2 + 1:]
-            WHERE user_id = $1
-        '''
-        await ctx.pool.execute(query, ctx.author.id, index)
+        await ctx.pool.execute(queries.TODO_REMOVE, ctx.author.id, index)
 
         await ctx.send(f'O ID `{index}` foi removido da lista de afazeres.')
 
@@ -117,8 +108,7 @@ class Reminders(commands.Cog, name='Lembretes'):
         if not result:
             return
 
-        query = 'DELETE FROM todos WHERE user_id = $1'
-        await ctx.pool.execute(query, ctx.author.id)
+        await ctx.pool.execute(queries.TODO_CLEAR, ctx.author.id)
 
         await ctx.send('Sua lista de afazeres foi limpa com sucesso.')
 
@@ -24,6 +24,8 @@ SOFTWARE.
 
 from discord.ext import commands
 
+from utils import queries
+
 
 class Settings(commands.Cog, name='Configurações'):
     """Configurações do servidor ou do próprio bot."""
@@ -35,10 +37,7 @@ class Settings(commands.Cog, name='Configurações'):
     @commands.group(invoke_without_command=True)
     async def prefix(self, ctx: commands.Context):
         """Mostra o prefixo do servidor."""
-        query = 'SELECT prefix FROM settings WHERE guild_id = $1'
-        fetch = await ctx.pool.fetchrow(query, ctx.guild.id)
-
-        prefix = fetch['prefix']
+        prefix = await ctx.bot.prefixes.get(ctx.guild.id)
         await ctx.send(f'O prefixo deste servidor é `{prefix}`.')
 
     @prefix.command(name='set')
@@ -48,14 +47,12 @@ class Settings(commands.Cog, name='Configurações'):
         if len(prefix) > self.limit:
             return await ctx.send(f'Prefixo muito grande, o limite é `{self.limit}` caracteres.')
 
-        query = 'SELECT prefix FROM settings WHERE guild_id = $1'
-        fetch = await ctx.pool.fetchrow(query, ctx.guild.id)
-
-        if prefix == fetch['prefix']:
+        if prefix == await ctx.bot.prefixes.get(ctx.guild.id):
             return await ctx.send('Este já é o prefixo atual do servidor.')
 
-        query = 'UPDATE settings SET prefix = $2 WHERE guild_id = $1'
-        await ctx.pool.execute(query, ctx.guild.id, prefix)
+        await ctx.pool.execute(queries.PREFIX_SET, ctx.guild.id, prefix)
+        ctx.bot.prefixes.set(ctx.guild.id, prefix)
+        await ctx.bot.invalidator.notify('settings', ctx.guild.id)
 
         await ctx.send(f'Você alterou o prefixo do servidor para `{prefix}`.')
 
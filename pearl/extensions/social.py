@@ -24,12 +24,14 @@ SOFTWARE.
 
 from typing import List
 
-import nekos
 import discord
 from discord.ext import commands
 
 from utils.errors import *
 from utils.formats import human_join
+from utils.lazy import lazy_import
+
+nekos = lazy_import('nekos')
 
 
 class Social(commands.Cog):
@@ -52,7 +54,7 @@ class Social(commands.Cog):
     @commands.command()
     async def hug(self, ctx: commands.Context, members: commands.Greedy[discord.Member]):
         self.valid_mentions(ctx, members)
-        image = await ctx.loop.run_in_executor(None, nekos.img, 'hug')
+        image = await ctx.bot.offload.run_io(nekos.img, 'hug')
 
         cuteheart = ctx.constants.cuteheart_emoji
         all_members = human_join([member.name for member in members], final='e')
@@ -62,7 +64,7 @@ class Social(commands.Cog):
     @commands.command()
     async def kiss(self, ctx: commands.Context, members: commands.Greedy[discord.Member]):
         self.valid_mentions(ctx, members)
-        image = await ctx.loop.run_in_executor(None, nekos.img, 'kiss')
+        image = await ctx.bot.offload.run_io(nekos.img, 'kiss')
 
         cuteheart = ctx.constants.cuteheart_emoji
         all_members = human_join([member.name for member in members], final='e')
@@ -72,7 +74,7 @@ class Social(commands.Cog):
     @commands.command()
     async def pat(self, ctx: commands.Context, members: commands.Greedy[discord.Member]):
         self.valid_mentions(ctx, members)
-        image = await ctx.loop.run_in_executor(None, nekos.img, 'pat')
+        image = await ctx.bot.offload.run_io(nekos.img, 'pat')
 
         cuteheart = ctx.constants.cuteheart_emoji
         all_members = human_join([member.name for member in members], final='e')
@@ -82,7 +84,7 @@ class Social(commands.Cog):
     @commands.command()
     async def tickle(self, ctx: commands.Context, members: commands.Greedy[discord.Member]):
         self.valid_mentions(ctx, members)
-        image = await ctx.loop.run_in_executor(None, nekos.img, 'tickle')
+        image = await ctx.bot.offload.run_io(nekos.img, 'tickle')
 
         cuteheart = ctx.constants.cuteheart_emoji
         all_members = human_join([member.name for member in members], final='e')
@@ -92,7 +94,7 @@ class Social(commands.Cog):
     @commands.command()
     async def poke(self, ctx: commands.Context, members: commands.Greedy[discord.Member]):
         self.valid_mentions(ctx, members)
-        image = await ctx.loop.run_in_executor(None, nekos.img, 'poke')
+        image = await ctx.bot.offload.run_io(nekos.img, 'poke')
 
         cuteheart = ctx.constants.cuteheart_emoji
         all_members = human_join([member.name for member in members], final='e')
@@ -102,7 +104,7 @@ class Social(commands.Cog):
     @commands.command()
     async def slap(self, ctx: commands.Context, members: commands.Greedy[discord.Member]):
         self.valid_mentions(ctx, members)
-        image = await ctx.loop.run_in_executor(None, nekos.img, 'slap')
+        image = await ctx.bot.offload.run_io(nekos.img, 'slap')
 
         cuteheart = ctx.constants.cuteheart_emoji
         all_members = human_join([member.name for member in members], final='e')
@@ -112,7 +114,7 @@ class Social(commands.Cog):
     @commands.command()
     async def cuddle(self, ctx: commands.Context, members: commands.Greedy[discord.Member]):
         self.valid_mentions(ctx, members)
-        image = await ctx.loop.run_in_executor(None, nekos.img, 'cuddle')
+        image = await ctx.bot.offload.run_io(nekos.img, 'cuddle')
 
         cuteheart = ctx.constants.cuteheart_emoji
         all_members = human_join([member.name for member in members], final='e')
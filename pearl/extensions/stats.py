@@ -27,6 +27,8 @@ from datetime import datetime
 import humanize
 from discord.ext import commands
 
+from utils import cache
+
 
 class Stats(commands.Cog, name='Estatísticas'):
     """Comandos que mostram algumas estatísticas do bot."""
@@ -39,6 +41,220 @@ class Stats(commands.Cog, name='Estatísticas'):
         delta = humanize.precisedelta(ctx.bot.uptime, format='%0.0f')
         await ctx.send(f'Estou online há **{delta}**.')
 
+    @commands.group(invoke_without_command=True)
+    async def stats(self, ctx: commands.Context):
+        """Mostra estatísticas internas do bot."""
+        await ctx.send_help(self.stats)
+
+    @stats.command(name='prefixes')
+    async def stats_prefixes(self, ctx: commands.Context):
+        """Mostra o uso do cache de prefixos."""
+        prefixes = ctx.bot.prefixes
+        total = prefixes.hits + prefixes.misses
+        ratio = prefixes.hits / total * 100 if total else 0
+
+        content = f'Servidores em cache: **{len(prefixes)}**\n' \
+                  f'Acertos: **{prefixes.hits}**\n' \
+                  f'Falhas: **{prefixes.misses}**\n' \
+                  f'Sem banco de dados: **{prefixes.fallbacks}**\n' \
+                  f'Taxa de acerto: **{ratio:.2f}%**'
+        await ctx.send(content, title='Cache de prefixos')
+
+    @stats.command(name='dispatch')
+    async def stats_dispatch(self, ctx: commands.Context):
+        """Mostra quantas mensagens foram descartadas antes de virarem comandos."""
+        drops = ctx.bot.dispatch_drops
+
+        content = f'Autores bots: **{drops["bot"]}**\n' \
+                  f'Sem prefixo: **{drops["prefix"]}**\n' \
+                  f'Comando inexistente: **{drops["command"]}**\n' \
+                  f'Limite de uso: **{drops["ratelimit"]}**\n' \
+                  f'Sobrecarga: **{drops["shed"]}**'
+        await ctx.send(content, title='Mensagens descartadas')
+
+    @stats.group(name='commands', invoke_without_command=True)
+    async def stats_commands(self, ctx: commands.Context, *, command: str = None):
+        """Mostra a latência dos comandos (p50/p95/p99)."""
+        all_stats = ctx.bot.command_stats.commands
+
+        if not all_stats:
+            return await ctx.send('Nenhum comando foi medido ainda.')
+
+        if command is None:
+            items = sorted(all_stats.items(), key=lambda item: item[1]['total'].percentile(99), reverse=True)
+            lines = []
+
+            for name, histograms in items:
+                total = histograms['total']
+                lines.append(
+                    f'`{name}` ({total.count}x): p50 **{total.percentile(50):.0f}ms**, '
+                    f'p95 **{total.percentile(95):.0f}ms**, p99 **{total.percentile(99):.0f}ms**'
+                )
+
+            return await ctx.paginate(lines, per_page=15, title='Latência dos comandos')
+
+        histograms = all_stats.get(command)
+        if histograms is None:
+            return await ctx.send(f'O comando `{command}` não foi medido ainda.')
+
+        names = {'total': 'Total', 'db': 'Banco de dados', 'http': 'HTTP', 'discord': 'API do Discord'}
+        fields = []
+
+        for phase, histogram in histograms.items():
+            value = f'p50 **{histogram.percentile(50):.1f}ms**\n' \
+                    f'p95 **{histogram.percentile(95):.1f}ms**\n' \
+                    f'p99 **{histogram.percentile(99):.1f}ms**\n' \
+                    f'máx. **{histogram.max:.1f}ms**'
+            fields.append({'name': names[phase], 'value': value})
+
+        count = histograms['total'].count
+        await ctx.send(f'Medido {count} vezes.', title=f'Latência de {command}', fields=fields)
+
+    @stats_commands.command(name='reset')
+    @commands.is_owner()
+    async def stats_commands_reset(self, ctx: commands.Context):
+        """Limpa a latência medida dos comandos."""
+        ctx.bot.command_stats.reset()
+        await ctx.send('As estatísticas dos comandos foram limpas.')
+
+    @stats.command(name='loop')
+    async def stats_loop(self, ctx: commands.Context):
+        """Mostra o atraso do event loop e os callbacks lentos."""
+        monitor = ctx.bot.loop_monitor
+        lag = monitor.lag
+
+        content = f'Atraso atual: **{monitor.current_lag:.1f}ms**\n' \
+                  f'p50 **{lag.percentile(50):.1f}ms**, p95 **{lag.percentile(95):.1f}ms**, ' \
+                  f'p99 **{lag.percentile(99):.1f}ms**, máx. **{lag.max:.1f}ms**\n' \
+                  f'Callbacks acima de {monitor.threshold * 1000:.0f}ms: **{monitor.total_reports}**'
+
+        if not monitor.reports:
+            return await ctx.send(content, title='Event loop')
+
+        pages = [content]
+        for report in reversed(monitor.reports):
+            duration = f'{report.duration * 1000:.0f}ms' if report.duration is not None else 'em andamento'
+            stack = ''.join(report.stack[-8:])[-1800:]
+            pages.append(f'{report.when:%d/%m %H:%M:%S} ({duration})\n```py\n{stack}```')
+
+        await ctx.paginate(pages, title='Event loop')
+
+    @stats.command(name='ratelimit')
+    async def stats_ratelimit(self, ctx: commands.Context):
+        """Mostra os limites de uso por categoria."""
+        fields = []
+
+        for name, limiter in (('Usuários', ctx.bot.user_ratelimit), ('Servidores', ctx.bot.guild_ratelimit)):
+            lines = [f'Buckets ativos: **{len(limiter.buckets)}**']
+
+            for category in limiter.limits:
+                rate, per = limiter.get_limit(category)
+                allowed = limiter.allowed[category]
+                limited = limiter.limited[category]
+
+                lines.append(f'{category or "Outros"} ({rate}/{per:.0f}s): {allowed} permitidos, {limited} bloqueados')
+
+            fields.append({'name': name, 'value': '\n'.join(lines), 'inline': False})
+
+        await ctx.send(title='Limites de uso', fields=fields)
+
+    @stats.command(name='scheduler')
+    async def stats_scheduler(self, ctx: commands.Context):
+        """Mostra a fila de execução dos comandos."""
+        scheduler = ctx.bot.scheduler
+        names = ('Alta', 'Normal', 'Baixa')
+
+        content = f'Em execução: **{scheduler.active}**/{scheduler.concurrency}\n' \
+                  f'Na fila: **{scheduler.depth}**/{scheduler.max_queue}'
+
+        lines = [
+            f'{name}: {scheduler.deferred[priority]} enfileirados, {scheduler.dropped[priority]} descartados'
+            for priority, name in enumerate(names)
+        ]
+        fields = [{'name': 'Prioridades', 'value': '\n'.join(lines), 'inline': False}]
+
+        await ctx.send(content, title='Fila de comandos', fields=fields)
+
+    @stats.command(name='http')
+    async def stats_http(self, ctx: commands.Context):
+        """Mostra a latência e os erros das requisições por host."""
+        hosts = ctx.bot.http_metrics.hosts
+
+        if not hosts:
+            return await ctx.send('Nenhuma requisição foi feita ainda.')
+
+        lines = []
+        for host, stats in sorted(hosts.items(), key=lambda item: item[1].requests, reverse=True):
+            latency = stats.latency
+            lines.append(
+                f'`{host}`: {stats.requests} requisições, {stats.errors} erros\n'
+                f'p50 **{latency.percentile(50):.0f}ms**, p95 **{latency.percentile(95):.0f}ms**, '
+                f'p99 **{latency.percentile(99):.0f}ms**'
+            )
+
+        await ctx.paginate(lines, per_page=8, title='Requisições HTTP')
+
+    @stats.command(name='database', aliases=['db'])
+    async def stats_database(self, ctx: commands.Context):
+        """Mostra o estado do circuit breaker do banco de dados."""
+        breaker = ctx.bot.pool.breaker
+
+        content = f'Estado: **{breaker.state}**\n' \
+                  f'Falhas seguidas: **{breaker.failures}**/{breaker.threshold}\n' \
+                  f'Chamadas recusadas: **{breaker.rejected}**\n' \
+                  f'Prazo por consulta: **{ctx.bot.pool.deadline}s**'
+
+        invalidator = ctx.bot.invalidator
+        received = ', '.join(f'{table}: {count}' for table, count in invalidator.received.items()) or 'nenhuma'
+        content += f'\n\nOuvinte de invalidações: **{"conectado" if invalidator.connected else "desconectado"}**\n' \
+                   f'Invalidações recebidas: {received}\n' \
+                   f'Reconexões: **{invalidator.reconnects}**, ressincronizações: **{invalidator.resyncs}**'
+
+        lines = [
+            f'{datetime.fromtimestamp(when):%d/%m %H:%M:%S}: {before} → {after}'
+            for when, before, after in reversed(breaker.transitions)
+        ]
+        fields = [{'name': 'Transições', 'value': '\n'.join(lines) or 'Nenhuma', 'inline': False}]
+
+        await ctx.send(content, title='Banco de dados', fields=fields)
+
+    @stats.command(name='caches')
+    async def stats_caches(self, ctx: commands.Context):
+        """Mostra o uso de cada cache em memória."""
+        if not cache.caches:
+            return await ctx.send('Nenhum cache foi criado ainda.')
+
+        lines = []
+        for name, item in sorted(cache.caches.items()):
+            total = item.hits + item.misses
+            ratio = item.hits / total * 100 if total else 0
+            size = f', {humanize.naturalsize(item.bytes)}' if item.max_bytes is not None else ''
+
+            lines.append(
+                f'`{name}` ({item.policy}): **{len(item)}** itens{size}\n'
+                f'Taxa de acerto **{ratio:.2f}%** ({item.hits} acertos, {item.misses} falhas), '
+                f'{item.loads} cargas, {item.evictions} despejos, {item.expirations} expirados'
+            )
+
+        await ctx.paginate(lines, per_page=8, title='Caches')
+
+    @stats.command(name='offload')
+    async def stats_offload(self, ctx: commands.Context):
+        """Mostra as filas de trabalhos fora do event loop."""
+        offload = ctx.bot.offload
+        names = {'io': 'Threads (IO)', 'cpu': 'Processos (CPU)'}
+        fields = []
+
+        for kind, stats in offload.stats.items():
+            value = f'Pendentes: **{stats.pending}**/{offload.max_pending}\n' \
+                    f'{stats.completed} concluídos, {stats.failed} falharam, ' \
+                    f'{stats.timed_out} expiraram, {stats.rejected} recusados\n' \
+                    f'Espera: p50 **{stats.wait.percentile(50):.0f}ms**, p99 **{stats.wait.percentile(99):.0f}ms**\n' \
+                    f'Total: p50 **{stats.latency.percentile(50):.0f}ms**, p99 **{stats.latency.percentile(99):.0f}ms**'
+            fields.append({'name': names[kind], 'value': value, 'inline': False})
+
+        await ctx.send(title='Trabalhos fora do event loop', fields=fields)
+
 
 def setup(bot: commands.Bot) -> None:
     bot.add_cog(Stats(bot))
\ No newline at end of file
@@ -37,8 +37,8 @@ class Status(commands.Cog):
     async def set_status(self):
         name, type_ = next(self.activities)
         
-        guilds = len(self.bot.guilds)
-        users = len(self.bot.users) - 1
+        guilds = self.bot.guild_count
+        users = self.bot.user_count
 
         name = name.format(users=users, guilds=guilds)
 
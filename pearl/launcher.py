@@ -0,0 +1,186 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+"""Runs Pearl as several processes, each one owning a slice of the shards.
+
+    python launcher.py --clusters 4 --shards 16
+
+A supervisor starts one worker process per cluster, each with its own
+event loop, pool and session, and restarts any worker that dies.
+"""
+
+import time
+import signal
+import logging
+import argparse
+import multiprocessing
+from typing import List, Dict
+
+import humanize
+
+import config
+from pearl import Pearl, setup_logging, install_event_loop
+from utils.cluster import ClusterStats, split_shards
+
+
+def run_cluster(cluster_id: int, shard_ids: List[int], shard_count: int, stats: ClusterStats, loop: str) -> None:
+    """Entry point of a worker process."""
+    # forked workers inherit the supervisor's signal handlers and log handlers,
+    # once running Pearl.run handles both signals by closing gracefully
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    logging.getLogger().handlers.clear()
+
+    with setup_logging(f'logs/pearl-{cluster_id}.log'):
+        humanize.i18n.activate('pt_BR')
+        install_event_loop(loop)
+
+        pearl = Pearl(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id, cluster_stats=stats)
+        pearl.run(config.token)
+
+
+class Supervisor:
+    """Starts the cluster processes and restarts the ones that crash."""
+
+    MAX_BACKOFF = 60
+
+    def __init__(self, clusters: int, shard_count: int, *, loop: str = 'asyncio', stop_timeout: float = 40.0):
+        self.logger = logging.getLogger('pearl.launcher')
+        self.shard_count = shard_count
+        self.loop = loop
+        self.stop_timeout = stop_timeout
+        self.shards = split_shards(shard_count, clusters)
+        self.stats = ClusterStats(clusters)
+
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.failures: Dict[int, int] = {}
+        self.started_at: Dict[int, float] = {}
+        self.running = True
+
+    def start(self, cluster_id: int) -> None:
+        process = multiprocessing.Process(
+            target=run_cluster,
+            args=(cluster_id, self.shards[cluster_id], self.shard_count, self.stats, self.loop),
+            name=f'pearl-cluster-{cluster_id}'
+        )
+        process.start()
+
+        self.processes[cluster_id] = process
+        self.started_at[cluster_id] = time.monotonic()
+        self.logger.info('Cluster %s started with shards %s (pid %s)' % (cluster_id, self.shards[cluster_id], process.pid))
+
+    def stop(self, *_) -> None:
+        self.running = False
+
+    def check(self, cluster_id: int) -> None:
+        process = self.processes[cluster_id]
+        if process.is_alive():
+            # a cluster that stayed up for a while is considered healthy again
+            if time.monotonic() - self.started_at[cluster_id] > self.MAX_BACKOFF:
+                self.failures[cluster_id] = 0
+            return
+
+        failures = self.failures.get(cluster_id, 0) + 1
+        self.failures[cluster_id] = failures
+
+        backoff = min(2 ** failures, self.MAX_BACKOFF)
+        self.logger.warning('Cluster %s exited with code %s, restarting in %ss' % (cluster_id, process.exitcode, backoff))
+
+        self.started_at[cluster_id] = time.monotonic() + backoff
+        self.processes[cluster_id] = _Pending(backoff)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        for cluster_id in range(len(self.shards)):
+            self.start(cluster_id)
+
+        while self.running:
+            for cluster_id, process in list(self.processes.items()):
+                if isinstance(process, _Pending):
+                    if process.ready():
+                        self.start(cluster_id)
+                    continue
+
+                self.check(cluster_id)
+
+            time.sleep(1)
+
+        self.stop_clusters()
+
+    def stop_clusters(self) -> None:
+        """Asks every cluster to close gracefully, killing the ones that don't in time.
+
+        SIGTERM makes a worker drain its commands and save its gateway
+        sessions and snapshots, so they get ``stop_timeout`` seconds for it.
+        """
+        processes = [process for process in self.processes.values() if isinstance(process, multiprocessing.Process)]
+
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.stop_timeout
+
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+
+            if process.is_alive():
+                self.logger.warning('Cluster %s did not close in %ss, killing it' % (process.name, self.stop_timeout))
+                process.kill()
+                process.join()
+
+
+class _Pending:
+    """Placeholder of a cluster waiting for its restart backoff."""
+
+    def __init__(self, delay: float):
+        self.deadline = time.monotonic() + delay
+
+    def ready(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Runs Pearl split into several processes.')
+    parser.add_argument('--clusters', type=int, default=multiprocessing.cpu_count(), help='amount of worker processes')
+    parser.add_argument('--shards', type=int, help='total amount of shards, defaults to one per cluster')
+    parser.add_argument('--loop', choices=('asyncio', 'uvloop'), default=getattr(config, 'event_loop', 'asyncio'),
+                        help='event loop implementation used by the clusters')
+    args = parser.parse_args()
+
+    shard_count = args.shards or args.clusters
+    clusters = min(args.clusters, shard_count)
+
+    # a bit more than the workers' own shutdown deadline, so they hit theirs first
+    stop_timeout = getattr(config, 'cluster_stop_timeout', getattr(config, 'shutdown_timeout', 30.0) + 10)
+
+    supervisor = Supervisor(clusters, shard_count, loop=args.loop, stop_timeout=stop_timeout)
+    supervisor.run()
+
+
+if __name__ == '__main__':
+    with setup_logging('logs/launcher.log'):
+        main()
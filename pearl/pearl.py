@@ -45,44 +45,60 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 '''
 
+import argparse
 import contextlib
 import logging
 import os
 import re
 import asyncio
 import importlib
-import json
+import signal
+import time
+import itertools
+from queue import SimpleQueue
+from logging.handlers import QueueListener
+from collections import Counter, defaultdict
 from datetime import datetime
-from typing import Tuple
+from typing import Any, Awaitable, Callable, Tuple, Optional
 
 import discord
 import asyncpg
 import humanize
-import aiohttp
-import asyncdagpi
+from discord.client import _cleanup_loop
 from discord.ext import commands
 
 import config
+from utils import fastjson
 from utils.context import Context
+from utils.breaker import CircuitBreaker
+from utils.db import InstrumentedPool
+from utils.gateway import GatewayResumer, SessionStore
+from utils.snapshot import Snapshots
+from utils.invalidation import CacheInvalidator
+from utils.http import HTTPMetrics, create_session
+from utils.logs import JSONFormatter, LogQueueHandler, create_file_handler
+from utils.members import MemberLRU
+from utils.monitor import LoopMonitor
+from utils.metrics import CommandStats, start_timing, current_timing, timed
+from utils.lazy import lazy_import
+from utils.cluster import ClusterStats
+from utils.errors import RateLimited, Overloaded
+from utils.ratelimit import RateLimiter
+from utils.scheduler import CommandScheduler
+from utils.offload import Offloader
+from utils.prefixes import PrefixCache, GLOBAL_PREFIXES, compile_prefixes
+
+asyncdagpi = lazy_import('asyncdagpi')
 
 
 async def get_prefix(bot: commands.Bot, message: discord.Message) -> Tuple[str]:
     """Returns a tuple with guild's custom prefix and global prefix."""
-    query = 'SELECT prefix FROM settings WHERE guild_id = $1'
-    fetch = await bot.pool.fetchrow(query, message.guild.id)
+    prefix = await bot.prefixes.get(message.guild.id)
+    return (prefix, *GLOBAL_PREFIXES)
 
-    if not fetch:
-        insert_query = 'INSERT INTO settings (guild_id) VALUES ($1)'
-        await bot.pool.execute(insert_query, message.guild.id)
 
-        # re-fetch data
-        fetch = await bot.pool.fetchrow(query, message.guild.id)
-    
-    return (fetch['prefix'], 'pearl ', 'hey pearl pls ')
-
-
-class Pearl(commands.Bot):
-    def __init__(self):
+class Pearl(commands.AutoShardedBot):
+    def __init__(self, *, cluster_id: int = None, cluster_stats: ClusterStats = None, **kwargs):
         _intents = discord.Intents.none()
         _intents.members = True
         _intents.guilds = True
@@ -94,18 +110,61 @@ class Pearl(commands.Bot):
         _allowed_mentions = discord.AllowedMentions.none()
         _allowed_mentions.users = True
 
+        # lean mode keeps only recently seen members instead of every member
+        lean_members = getattr(config, 'lean_member_cache', False)
+        if lean_members:
+            _member_cache_flags = discord.MemberCacheFlags.from_intents(_intents)
+            _member_cache_flags.joined = False
+
+            kwargs.setdefault('member_cache_flags', _member_cache_flags)
+            kwargs.setdefault('chunk_guilds_at_startup', False)
+
         super().__init__(
             command_prefix=get_prefix,
             intents=_intents,
-            allowed_mentions=_allowed_mentions
+            allowed_mentions=_allowed_mentions,
+            **kwargs
         )
-        run = self.loop.run_until_complete
-
-        self.pool = run(create_pool(config.postgres, loop=self.loop))
-        self.session = run(create_session(self.http.connector, loop=self.loop))
-        self.dagpi = asyncdagpi.Client(config.dagpi, loop=self.loop, session=self.session)
 
         self.logger = logging.getLogger('pearl')
+        self.dispatch_drops = Counter()
+        self.command_stats = CommandStats()
+        self.http_metrics = HTTPMetrics()
+        self.offload = Offloader(
+            self.loop,
+            threads=getattr(config, 'offload_threads', 8),
+            processes=getattr(config, 'offload_processes', 2),
+            max_pending=getattr(config, 'offload_max_pending', 64),
+            timeout=getattr(config, 'offload_timeout', 30.0)
+        )
+        self.member_lru = MemberLRU(getattr(config, 'member_cache_size', 10000)) if lean_members else None
+
+        rate_limits = getattr(config, 'rate_limits', None)
+        self.user_ratelimit = RateLimiter(rate_limits)
+        self.guild_ratelimit = RateLimiter(rate_limits, multiplier=getattr(config, 'guild_rate_multiplier', 4))
+        self.boot_timings = {}
+        self.flush_hooks = []
+        self.raw_listeners = defaultdict(list)
+        self.closing = False
+        self._close_task = None
+        self._dagpi = None
+
+        # every request to Discord's API counts towards the command's timing
+        self.http.request = timed('discord')(self.http.request)
+
+        self.cluster_id = cluster_id
+        self.cluster_stats = cluster_stats
+        self.snapshots = Snapshots(getattr(config, 'snapshot_file', 'data/snapshot-{cluster}.json.z').format(cluster=cluster_id or 0))
+
+        # opt-in, as journaling every guild's payload has a memory cost
+        self.gateway_sessions = None
+        self.resumer = None
+
+        if getattr(config, 'gateway_resume', False):
+            path = getattr(config, 'gateway_session_file', 'data/gateway-{cluster}.json').format(cluster=cluster_id or 0)
+            self.gateway_sessions = SessionStore(path)
+            self.resumer = GatewayResumer(self, self.gateway_sessions)
+            self.add_raw_listener(self.gateway_sessions.handle, *self.gateway_sessions.events)
         self.all_extensions = []
 
         for root, _, items in os.walk('extensions'):
@@ -117,10 +176,51 @@ class Pearl(commands.Bot):
 
                 self.all_extensions.append(re.sub(r'\\|\/', '.', path))
 
+    @contextlib.contextmanager
+    def boot_phase(self, phase: str) -> None:
+        """Records how long a boot phase took."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.boot_timings[phase] = time.perf_counter() - started
+
+    @contextlib.contextmanager
+    def shutdown_step(self, step: str) -> None:
+        """Logs how long a shutdown step took, logging its error instead of raising it."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.logger.exception('Shutdown step \'%s\' failed' % step)
+        finally:
+            self.logger.info('Shutdown step \'%s\' took %.2fms' % (step, (time.perf_counter() - started) * 1000))
+
     @property
     def constants(self):
         return importlib.import_module('utils.constants')
 
+    @property
+    def dagpi(self):
+        """Returns Dagpi's client, creating it on first use."""
+        if self._dagpi is None:
+            self._dagpi = asyncdagpi.Client(config.dagpi, loop=self.loop, session=self.session)
+        return self._dagpi
+
+    @property
+    def guild_count(self) -> int:
+        """Returns the amount of guilds over every cluster."""
+        if self.cluster_stats is None:
+            return len(self.guilds)
+        return self.cluster_stats.total('guilds')
+
+    @property
+    def user_count(self) -> int:
+        """Returns the amount of users, without the bot itself, over every cluster."""
+        if self.cluster_stats is None:
+            return len(self.users) - 1
+        return self.cluster_stats.total('users')
+
     @property
     def uptime(self):
         return datetime.utcnow() - self.start_datetime
@@ -130,90 +230,520 @@ class Pearl(commands.Bot):
         if not message.guild:
             return
 
+        if self.member_lru is not None and isinstance(message.author, discord.Member):
+            self.member_lru.touch(message.author)
+
+        start_timing()
         await self.process_commands(message)
 
     async def on_ready(self) -> None:
-        """Loads all extensions when bot is ready."""
-        if not hasattr(self, 'start_datetime'):
-            self.start_datetime = datetime.utcnow()
+        """Logs the boot report on the first ready."""
+        if hasattr(self, 'start_datetime'):
+            return
+
+        self.start_datetime = datetime.utcnow()
+        self.boot_timings['gateway ready'] = time.perf_counter() - self._boot_started
+
+        for phase, elapsed in self.boot_timings.items():
+            self.logger.info('Boot phase \'%s\' took %.2fms' % (phase, elapsed * 1000))
+
+        if self.cluster_stats is not None:
+            self.loop.create_task(self.publish_cluster_stats())
+
+        print(f'Logged-in with {len(self.guilds)} guilds and {len(self.users)} users')
+
+    async def publish_cluster_stats(self) -> None:
+        """Keeps this cluster's counts up to date for the other clusters."""
+        while not self.is_closed():
+            self.cluster_stats.publish(self.cluster_id, guilds=len(self.guilds), users=len(self.users) - 1)
+            await asyncio.sleep(60)
+
+    async def start(self, *args, **kwargs) -> None:
+        """Runs the boot pipeline and then connects to the gateway.
+
+        The pool and the session are created in parallel while the extensions
+        are loaded, so extensions are loaded only once instead of on every
+        ``on_ready``.
+        """
+        self._boot_started = time.perf_counter()
+        self.setup_dispatch()
+
+        with self.boot_phase('snapshot'):
+            self.snapshots.load()
+
+        await asyncio.gather(self.connect_database(), self.connect_session(), self.load_extensions())
+        await super().start(*args, **kwargs)
+
+    async def launch_shard(self, gateway: str, shard_id: int, *, initial: bool = False) -> None:
+        """Resumes the shard's saved session when there's one, identifying otherwise."""
+        if self.resumer is None:
+            return await super().launch_shard(gateway, shard_id, initial=initial)
+
+        if initial:
+            self.resumer.restore(max_age=getattr(config, 'gateway_resume_max_age', 120.0))
+
+        if await self.resumer.resume(gateway, shard_id, initial=initial):
+            await super().launch_shard(gateway, shard_id, initial=initial)
+
+    async def on_shard_resumed(self, shard_id: int) -> None:
+        if self.resumer is not None:
+            self.resumer.shard_resumed(shard_id)
+
+    def save_gateway_sessions(self) -> None:
+        """Saves every shard's session so the next process can resume it."""
+        count = self.resumer.save()
+        self.logger.info('Saved the gateway sessions of %s shards' % count)
+
+    def setup_dispatch(self) -> None:
+        """Starts the loop monitor and the command scheduler, it must run inside the loop."""
+        self.loop_monitor = LoopMonitor(self.loop, threshold=getattr(config, 'slow_callback_threshold', 0.1))
+        self.loop_monitor.start()
+
+        self.scheduler = CommandScheduler(
+            concurrency=getattr(config, 'command_concurrency', 100),
+            max_queue=getattr(config, 'command_max_queue', 1000),
+            shed_depth=getattr(config, 'command_shed_depth', 100),
+            shed_lag=getattr(config, 'command_shed_lag', 250.0),
+            priorities=getattr(config, 'command_priorities', None),
+            monitor=self.loop_monitor
+        )
+
+    async def connect_database(self) -> None:
+        with self.boot_phase('database connect'):
+            self.pool = await create_pool(config.postgres, loop=self.loop)
+
+        self.pool.start_autoscaling()
+
+        self.prefixes = PrefixCache(self.pool)
+        self.snapshots.register('prefixes', self.prefixes.dump, max_age=getattr(config, 'prefix_snapshot_max_age', 3600.0))
+
+        # listening before the prefixes load, no change made meanwhile is missed
+        self.invalidator = CacheInvalidator(config.postgres, self.pool, channel=getattr(config, 'cache_channel', 'pearl_cache'))
+        self.invalidator.subscribe('settings', self.prefixes.remove, resync=self.prefixes.fill)
+        await self.invalidator.start()
+
+        snapshot = self.snapshots.restore('prefixes')
+        if snapshot is not None:
+            # the snapshot is served right away while the fresh prefixes load
+            self.prefixes.restore(snapshot)
+            self.loop.create_task(self.refresh_prefixes())
+        else:
+            with self.boot_phase('prefix cache'):
+                await self.prefixes.fill()
 
+    async def refresh_prefixes(self) -> None:
+        """Replaces the prefixes restored from a snapshot, retrying until it succeeds.
+
+        Until then the snapshot, which may be up to an hour old, keeps being
+        served, so a failure is retried with backoff instead of waiting for
+        the cache listener's next resync.
+        """
+        delay = 1
+
+        while not self.closing:
+            try:
+                await self.prefixes.fill()
+            except Exception:
+                self.logger.exception('Could not refresh the prefixes restored from the snapshot, retrying in %ss' % delay)
+            else:
+                return
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    async def connect_session(self) -> None:
+        with self.boot_phase('http session'):
+            self.session = await create_session(
+                loop=self.loop,
+                metrics=self.http_metrics,
+                limit=getattr(config, 'http_limit', 100),
+                limit_per_host=getattr(config, 'http_limit_per_host', 10),
+                dns_ttl=getattr(config, 'http_dns_ttl', 300),
+                keepalive=getattr(config, 'http_keepalive', 30.0),
+                timeout=getattr(config, 'http_timeout', 30.0),
+                connect_timeout=getattr(config, 'http_connect_timeout', 10.0)
+            )
+
+    async def load_extensions(self) -> None:
         for extension in self.all_extensions:
             try:
-                self.load_extension(extension)
+                with self.boot_phase(f'extension {extension}'):
+                    self.load_extension(extension)
             except:
                 self.logger.exception('The extension \'%s\' could not be loaded' % extension)
             else:
                 self.logger.info('The extension \'%s\' has been loaded' % extension)
 
-        print(f'Logged-in with {len(self.guilds)} guilds and {len(self.users)} users')
+            # yield to the loop so the pool and the session can keep connecting
+            await asyncio.sleep(0)
 
     async def process_commands(self, message: discord.Message) -> None:
-        """Event overwritten for adding some checks."""
+        """Event overwritten for adding some checks.
+
+        Messages are filtered before a context is built: bot authors are
+        dropped first, then messages not starting with any of the guild's
+        prefixes. The amount of messages dropped by each stage is counted.
+        """
+        if self.closing:
+            self.dispatch_drops['closing'] += 1
+            return
+
+        if message.author.bot:
+            self.dispatch_drops['bot'] += 1
+            return
+
+        prefix = await self.prefixes.get(message.guild.id)
+        if not compile_prefixes(prefix).match(message.content):
+            self.dispatch_drops['prefix'] += 1
+            return
+
         ctx = await self.get_context(message, cls=Context)
 
         if not ctx.command:
+            self.dispatch_drops['command'] += 1
             return
 
-        if ctx.author.bot:
+        if not self.check_ratelimit(ctx):
+            self.dispatch_drops['ratelimit'] += 1
+            return
+
+        category = ctx.cog.qualified_name if ctx.cog else None
+
+        try:
+            async with self.scheduler.slot(category):
+                await self.invoke(ctx)
+        except Overloaded as error:
+            self.dispatch_drops['shed'] += 1
+            self.dispatch('command_error', ctx, error)
+            return
+
+        if self.member_lru is not None:
+            self.remember_members(ctx)
+
+        timing = current_timing()
+        if timing is not None:
+            self.command_stats.record(ctx.command.qualified_name, timing)
+
+    def remember_members(self, ctx: Context) -> None:
+        """Caches the members resolved by the command's converters."""
+        for argument in itertools.chain(ctx.args, ctx.kwargs.values()):
+            members = argument if isinstance(argument, list) else [argument]
+
+            for member in members:
+                if isinstance(member, discord.Member):
+                    self.member_lru.touch(member)
+
+    async def get_or_fetch_member(self, guild: discord.Guild, member_id: int) -> Optional[discord.Member]:
+        """Returns a member from the cache, fetching it when it isn't cached."""
+        member = guild.get_member(member_id)
+        if member is not None:
+            return member
+
+        ws = self._get_websocket(shard_id=guild.shard_id)
+
+        if ws.is_ratelimited():
+            try:
+                member = await guild.fetch_member(member_id)
+            except discord.HTTPException:
+                return None
+        else:
+            members = await guild.query_members(limit=1, user_ids=[member_id], cache=False)
+            if not members:
+                return None
+
+            member = members[0]
+
+        if self.member_lru is not None:
+            self.member_lru.touch(member)
+
+        return member
+
+    def check_ratelimit(self, ctx: Context) -> bool:
+        """Takes a token from the author's and the guild's buckets.
+
+        The first refused command of a bucket dispatches a ``RateLimited``
+        error so the author is warned only once. A refused command costs
+        nothing, the tokens already taken for it are given back.
+        """
+        category = ctx.cog.qualified_name if ctx.cog else None
+        taken = []
+
+        for limiter, key in ((self.user_ratelimit, ctx.author.id), (self.guild_ratelimit, ctx.guild.id)):
+            retry_after, first = limiter.hit(category, key)
+            if not retry_after:
+                taken.append((limiter, key))
+                continue
+
+            for taken_limiter, taken_key in taken:
+                taken_limiter.refund(category, taken_key)
+
+            if first:
+                self.dispatch('command_error', ctx, RateLimited(retry_after))
+            return False
+
+        return True
+
+    def add_raw_listener(self, func: Callable[[dict], Any], *events: str) -> None:
+        """Registers a listener for the raw payloads of the given gateway events.
+
+        Unlike ``on_socket_response`` listeners, it's only called for those
+        events. Coroutine functions are scheduled like any event listener,
+        plain functions are called right away.
+        """
+        for event in events:
+            self.raw_listeners[event].append(func)
+
+    def remove_raw_listener(self, func: Callable[[dict], Any], *events: str) -> None:
+        for event in events or list(self.raw_listeners):
+            with contextlib.suppress(ValueError):
+                self.raw_listeners[event].remove(func)
+
+    def dispatch(self, event_name: str, *args, **kwargs) -> None:
+        if event_name == 'socket_response':
+            self.route_raw_event(args[0])
+
+        super().dispatch(event_name, *args, **kwargs)
+
+    def route_raw_event(self, msg: dict) -> None:
+        for func in self.raw_listeners.get(msg.get('t'), ()):
+            if asyncio.iscoroutinefunction(func):
+                self._schedule_event(func, 'socket_response', msg)
+                continue
+
+            try:
+                func(msg)
+            except Exception:
+                self.logger.exception('Raw listener %r failed on %s' % (func, msg.get('t')))
+
+    def add_flush_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """Registers a coroutine function awaited on shutdown, before the pool is closed."""
+        self.flush_hooks.append(hook)
+
+    def remove_flush_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        with contextlib.suppress(ValueError):
+            self.flush_hooks.remove(hook)
+
+    async def run_flush_hooks(self, timeout: float) -> None:
+        tasks = [self.loop.create_task(hook()) for hook in self.flush_hooks]
+        if not tasks:
             return
 
-        await self.invoke(ctx)
+        done, pending = await asyncio.wait(tasks, timeout=max(timeout, 0))
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.logger.warning('Shutdown deadline reached with %d flush hooks still running' % len(pending))
+
+        for task in done:
+            if task.exception() is not None:
+                self.logger.error('A flush hook failed', exc_info=task.exception())
+
+    async def close_lavalink(self) -> None:
+        # lavalink.py has no public close, its session holds the nodes' websockets
+        session = getattr(self.lavalink, '_session', None)
+        if session is not None:
+            await session.close()
+
+    def run(self, *args, **kwargs) -> None:
+        """Runs the bot until it's closed, closing it gracefully on SIGINT and SIGTERM.
+
+        discord.py's ``run`` stops the loop on those signals and then cancels
+        every task, running commands included, so nothing is drained. Here
+        the signals start ``close`` and the loop is only stopped once it's
+        over, which makes a deploy as graceful as ``dev logout``. Where the
+        loop can't handle signals (Windows), Ctrl+C still closes gracefully.
+        """
+        loop = self.loop
+
+        def request_close(name: str) -> None:
+            self.logger.info('Received %s, closing' % name)
+            loop.create_task(self.close())
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, request_close, sig.name)
+            except NotImplementedError:
+                pass
+
+        async def runner():
+            try:
+                await self.start(*args, **kwargs)
+            finally:
+                await self.close()
+
+        try:
+            loop.run_until_complete(runner())
+        except KeyboardInterrupt:
+            loop.run_until_complete(self.close())
+        finally:
+            _cleanup_loop(loop)
 
     async def close(self) -> None:
-        """Closes the aiohttp session and then closes bot."""
-        await self.session.close()
-        await super().close()
+        """Drains the in-flight work and then closes everything in order.
 
+        New commands are refused as soon as closing starts. Running commands
+        and then the flush hooks are awaited until ``shutdown_timeout``, after
+        which they are abandoned. Only then the pool, the session, Lavalink
+        and the executors are closed, so flushed writes still reach the
+        database.
 
-async def create_pool(uri: str, *, loop: asyncio.BaseEventLoop) -> asyncpg.pool.Pool:
-    """Creates a PostgreSQL pool."""
-    def _encode_jsonb(value: dict) -> str:
-        return json.dumps(value)
+        Every caller waits for the same shutdown, so whoever stops the loop
+        afterwards can't cut it short.
+        """
+        if self._close_task is None:
+            self.closing = True
+            self._close_task = self.loop.create_task(self._shutdown())
 
-    def _decode_jsonb(value: str) -> dict:
-        return json.loads(value)
+        await asyncio.shield(self._close_task)
 
-    async def _init(conn: asyncpg.Connection):
-        await conn.set_type_codec('jsonb', schema='pg_catalog', encoder=_encode_jsonb, decoder=_decode_jsonb, format='text')
+    async def _shutdown(self) -> None:
+        deadline = self.loop.time() + getattr(config, 'shutdown_timeout', 30.0)
 
-    return await asyncpg.create_pool(uri, init=_init, loop=loop)
+        # saved first, so the messages refused from now on are replayed to the next process
+        if self.resumer is not None:
+            with self.shutdown_step('gateway sessions'):
+                self.save_gateway_sessions()
 
+        if hasattr(self, 'scheduler'):
+            with self.shutdown_step('drain commands'):
+                if not await self.scheduler.drain(deadline - self.loop.time()):
+                    self.logger.warning('Shutdown deadline reached with %d commands still running' % self.scheduler.active)
 
-async def create_session(connector: aiohttp.BaseConnector, *, loop: asyncio.BaseEventLoop) -> aiohttp.ClientSession:
-    """Creates an aiohttp session to make web requests."""
-    return aiohttp.ClientSession(loop=loop)
+        with self.shutdown_step('flush hooks'):
+            await self.run_flush_hooks(deadline - self.loop.time())
 
+        with self.shutdown_step('snapshots'):
+            # dumped here, as the caches are only safe to read from the loop
+            entries = self.snapshots.collect()
+            await self.offload.run_io(self.snapshots.write, entries)
 
-@contextlib.contextmanager
-def setup_logging() -> None:
-    """Setup a file-based logging."""
-    try:
-        # __enter__
-        dt_format = '%Y-%m-%d %H:%M:%S'
+        if hasattr(self, 'invalidator'):
+            with self.shutdown_step('cache listener'):
+                await self.invalidator.close()
+
+        if hasattr(self, 'pool'):
+            with self.shutdown_step('database pool'):
+                await self.pool.close()
+
+        if hasattr(self, 'session'):
+            with self.shutdown_step('http session'):
+                await self.session.close()
+
+        if hasattr(self, 'lavalink'):
+            with self.shutdown_step('lavalink'):
+                await self.close_lavalink()
+
+        with self.shutdown_step('offload'):
+            self.offload.shutdown()
+
+        if hasattr(self, 'loop_monitor'):
+            self.loop_monitor.stop()
+
+        with self.shutdown_step('gateway'):
+            await super().close()
+
+
+async def create_pool(uri: str, *, loop: asyncio.BaseEventLoop) -> InstrumentedPool:
+    """Creates an instrumented PostgreSQL pool."""
+    async def _init(conn: asyncpg.Connection):
+        await conn.set_type_codec('jsonb', schema='pg_catalog', encoder=fastjson.dumps, decoder=fastjson.loads, format='text')
+        # after the codecs, as prepared statements keep the codecs they were prepared with
+        await conn.prepare_registered()
+
+    return await InstrumentedPool.create(
+        uri,
+        init=_init,
+        loop=loop,
+        min_size=getattr(config, 'postgres_min_size', 4),
+        max_size=getattr(config, 'postgres_max_size', 10),
+        max_limit=getattr(config, 'postgres_max_limit', 40),
+        deadline=getattr(config, 'postgres_deadline', 5.0),
+        breaker=CircuitBreaker(
+            'postgres',
+            threshold=getattr(config, 'postgres_breaker_threshold', 5),
+            cooldown=getattr(config, 'postgres_breaker_cooldown', 30.0)
+        )
+    )
 
-        logging.getLogger('discord').setLevel(logging.INFO)
-        logging.getLogger('discord.http').setLevel(logging.WARN)
-    
-        logger = logging.getLogger()
-        logger.setLevel(logging.INFO)
 
-        handler = logging.FileHandler(filename='logs/pearl.log', encoding='utf-8', mode='w')
+@contextlib.contextmanager
+def setup_logging(filename: str = 'logs/pearl.log') -> None:
+    """Setup a file-based logging.
+
+    Records are put in a queue and written to disk by a background thread,
+    so slow disks never block the event loop.
+    """
+    dt_format = '%Y-%m-%d %H:%M:%S'
+
+    logging.getLogger('discord').setLevel(logging.INFO)
+    logging.getLogger('discord.http').setLevel(logging.WARN)
+
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+
+    file_handler = create_file_handler(
+        filename,
+        max_bytes=getattr(config, 'log_max_bytes', 32 * 1024 * 1024),
+        backup_count=getattr(config, 'log_backup_count', 5),
+        when=getattr(config, 'log_rotate_when', None)
+    )
+
+    if getattr(config, 'log_json', False):
+        formatter = JSONFormatter()
+    else:
         formatter = logging.Formatter('[{asctime}] [{levelname}] {name}: {message}', dt_format, style='{')
-    
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+
+    file_handler.setFormatter(formatter)
+
+    queue = SimpleQueue()
+    listener = QueueListener(queue, file_handler, respect_handler_level=True)
+
+    try:
+        # __enter__
+        listener.start()
+        logger.addHandler(LogQueueHandler(queue))
 
         yield
     finally:
         # __exit__
-        for handler in logger.handlers:
+        for handler in logger.handlers[:]:
             handler.close()
             logger.removeHandler(handler)
 
+        # stopping flushes the queued records, so the file is closed only afterwards
+        listener.stop()
+        file_handler.close()
+
+
+def install_event_loop(name: str) -> str:
+    """Installs the given event loop implementation, falling back to asyncio's.
+
+    It must be called before the bot is created, as the bot grabs its loop
+    when created. Returns the name of the installed implementation.
+    """
+    if name == 'uvloop':
+        try:
+            import uvloop
+        except ImportError:
+            logging.getLogger('pearl').warning('uvloop is not installed, falling back to asyncio\'s event loop')
+        else:
+            uvloop.install()
+            return 'uvloop'
+
+    asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+    return 'asyncio'
+
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description='Runs Pearl in a single process.')
+    parser.add_argument('--loop', choices=('asyncio', 'uvloop'), default=getattr(config, 'event_loop', 'asyncio'),
+                        help='event loop implementation')
+    args = parser.parse_args()
+
     humanize.i18n.activate('pt_BR')
-    
+    install_event_loop(args.loop)
+
     pearl = Pearl()
     pearl.run(config.token)
 
@@ -0,0 +1,36 @@
+import pytest
+
+from utils.metrics import Histogram
+
+
+def test_sub_second_percentiles():
+    histogram = Histogram()
+    for value in (0.3, 0.5, 0.8, 0.9):
+        histogram.record(value)
+
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(0.9, rel=0.01)
+
+
+def test_sub_millisecond_values_count_as_zero():
+    histogram = Histogram()
+    for value in (0.0, 0.0005, 0.001, 0.002, 0.004):
+        histogram.record(value)
+
+    assert histogram.zeros == 3
+    assert histogram.percentile(50) == 0.0
+    assert histogram.percentile(80) == pytest.approx(0.002, rel=0.01)
+    assert histogram.percentile(100) == pytest.approx(0.004, rel=0.01)
+
+
+def test_merge_keeps_zeros():
+    first, second = Histogram(), Histogram()
+    first.record(0.0)
+    second.record(0.0)
+    second.record(2.0)
+
+    first.merge(second)
+
+    assert first.count == 3
+    assert first.percentile(50) == 0.0
+    assert first.percentile(99) == pytest.approx(2.0, rel=0.01)
@@ -0,0 +1,99 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import time
+import logging
+from collections import deque
+from typing import Deque, Tuple
+
+from .errors import DatabaseUnavailable
+
+
+log = logging.getLogger('pearl.breaker')
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+class CircuitBreaker:
+    """Stops calling a dependency after it fails too many times in a row.
+
+    Once ``threshold`` consecutive failures happen the breaker opens and
+    every call fails fast with ``DatabaseUnavailable``. After ``cooldown``
+    seconds a single trial call is let through: if it succeeds the breaker
+    closes, otherwise it opens again.
+    """
+
+    def __init__(self, name: str, *, threshold: int = 5, cooldown: float = 30.0, history: int = 20):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self.state = CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at = 0.0
+        self.transitions: Deque[Tuple[float, str, str]] = deque(maxlen=history)
+
+        self._trial_at = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.cooldown
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+
+        log.warning('Circuit breaker \'%s\' went from %s to %s' % (self.name, self.state, state))
+        self.transitions.append((time.time(), self.state, state))
+        self.state = state
+
+    def before_call(self) -> None:
+        """Raises ``DatabaseUnavailable`` when the call shouldn't be made."""
+        if self.state == CLOSED:
+            return
+
+        # a trial which never reported back, e.g. cancelled, is given up on after the cooldown
+        now = time.monotonic()
+        trial_running = self._trial_at is not None and now - self._trial_at < self.cooldown
+
+        if self.is_open or trial_running:
+            self.rejected += 1
+            raise DatabaseUnavailable()
+
+        self._transition(HALF_OPEN)
+        self._trial_at = now
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_at = None
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_at = None
+
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
@@ -0,0 +1,303 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import sys
+import time
+import asyncio
+import functools
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+
+# every named cache, so their metrics can be shown together
+caches: Dict[str, 'Cache'] = {}
+
+_MISSING = object()
+
+
+class _LRU:
+    """Evicts the least recently used key."""
+
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def add(self, key: Hashable) -> None:
+        self._order[key] = None
+
+    def touch(self, key: Hashable) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: Hashable) -> None:
+        del self._order[key]
+
+    def victim(self) -> Hashable:
+        return next(iter(self._order))
+
+
+class _LFU:
+    """Evicts the least frequently used key, the oldest one among ties."""
+
+    def __init__(self):
+        self._counts: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, OrderedDict] = defaultdict(OrderedDict)
+        self._min = 0
+
+    def add(self, key: Hashable) -> None:
+        self._counts[key] = 1
+        self._buckets[1][key] = None
+        self._min = 1
+
+    def touch(self, key: Hashable) -> None:
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+
+        if not bucket:
+            del self._buckets[count]
+            if self._min == count:
+                self._min = count + 1
+
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def remove(self, key: Hashable) -> None:
+        count = self._counts.pop(key)
+        bucket = self._buckets[count]
+        del bucket[key]
+
+        if not bucket:
+            del self._buckets[count]
+            if self._min == count and self._counts:
+                self._min = min(self._buckets)
+
+    def victim(self) -> Hashable:
+        return next(iter(self._buckets[self._min]))
+
+
+POLICIES = {'lru': _LRU, 'lfu': _LFU}
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value: Any, expires_at: Optional[float], size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class Cache:
+    """A named in-process cache.
+
+    Entries expire after ``ttl`` seconds, and the cache is bounded by
+    ``max_entries`` and/or ``max_bytes``, as measured by ``sizeof``. When a
+    bound is reached, entries are evicted by the ``policy``, either ``lru``
+    or ``lfu``.
+
+    ``get_or_load`` runs a single load for concurrent misses of the same
+    key. When ``negative_ttl`` is set, loads returning ``None`` are cached
+    for that long, so missing values aren't looked up on every call. A load
+    overtaken by a ``set``, ``delete`` or ``clear`` of its key returns its
+    value to its callers but doesn't store it, as it may be stale.
+    """
+
+    def __init__(self, name: str, *, max_entries: int = None, max_bytes: int = None, ttl: float = None,
+                 negative_ttl: float = None, policy: str = 'lru', sizeof: Callable[[Any], int] = sys.getsizeof):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.policy = policy
+        self.sizeof = sizeof
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self.bytes = 0
+
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._policy = POLICIES[policy]()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        # [generation, loads in flight] of the keys being loaded
+        self._generations: Dict[Hashable, List[int]] = {}
+
+        caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self.expirations += 1
+            self._remove(key)
+            return _MISSING
+
+        return entry
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._policy.remove(key)
+        self.bytes -= entry.size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._lookup(key)
+
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._policy.touch(key)
+        return entry.value
+
+    def _invalidate(self, key: Hashable) -> None:
+        # loads in flight read the value before this write, new callers must not join them
+        self._pending.pop(key, None)
+
+        state = self._generations.get(key)
+        if state is not None:
+            state[0] += 1
+
+    def set(self, key: Hashable, value: Any, *, ttl: float = None) -> None:
+        self._invalidate(key)
+        self._store(key, value, ttl)
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+
+        self._entries[key] = _Entry(value, expires_at, size)
+        self._policy.add(key)
+        self.bytes += size
+
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self.evictions += 1
+            self._remove(self._policy.victim())
+
+    def delete(self, key: Hashable) -> None:
+        self._invalidate(key)
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        for key in list(self._generations):
+            self._invalidate(key)
+        self._pending.clear()
+
+        for key in list(self._entries):
+            self._remove(key)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Iterates over the entries which haven't expired, without counting hits."""
+        for key in list(self._entries):
+            entry = self._lookup(key)
+            if entry is not _MISSING:
+                yield key, entry.value
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the key's value, awaiting ``load`` on a miss."""
+        entry = self._lookup(key)
+        if entry is not _MISSING:
+            self.hits += 1
+            self._policy.touch(key)
+            return entry.value
+
+        self.misses += 1
+
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = asyncio.ensure_future(self._load(key, load))
+            future.add_done_callback(functools.partial(self._forget, key))
+
+        # shared with the other callers, so one being cancelled must not cancel the load
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        # an invalidation may have already replaced it with a newer load
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        self.loads += 1
+
+        state = self._generations.setdefault(key, [0, 0])
+        generation = state[0]
+        state[1] += 1
+
+        try:
+            value = await load()
+        finally:
+            state[1] -= 1
+            if not state[1]:
+                del self._generations[key]
+
+        if state[0] != generation:
+            return value
+
+        if value is not None:
+            self._store(key, value, self.ttl)
+        elif self.negative_ttl is not None:
+            self._store(key, None, self.negative_ttl)
+
+        return value
+
+
+def cached(name: str, *, key: Callable[..., Hashable] = None, **options) -> Callable:
+    """Caches an async function's results by its arguments.
+
+    ``key`` builds the cache key from the arguments, by default they are
+    used as they are. The cache is available as the function's ``cache``.
+    """
+    cache = Cache(name, **options)
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key is not None else (args, tuple(sorted(kwargs.items())))
+            return await cache.get_or_load(cache_key, functools.partial(func, *args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,57 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import multiprocessing
+from typing import List
+
+
+class ClusterStats:
+    """Global counters shared between every cluster process.
+
+    Each cluster owns one slot per field inside a shared memory array, so
+    publishing and reading the totals never blocks on the other processes.
+    """
+
+    FIELDS = ('guilds', 'users')
+
+    def __init__(self, clusters: int):
+        self.clusters = clusters
+        self._array = multiprocessing.Array('q', clusters * len(self.FIELDS), lock=False)
+
+    def _index(self, cluster_id: int, field: str) -> int:
+        return cluster_id * len(self.FIELDS) + self.FIELDS.index(field)
+
+    def publish(self, cluster_id: int, **counts: int) -> None:
+        """Stores the counts of the given cluster."""
+        for field, value in counts.items():
+            self._array[self._index(cluster_id, field)] = value
+
+    def total(self, field: str) -> int:
+        """Returns the sum of a field over every cluster."""
+        return sum(self._array[self._index(cluster_id, field)] for cluster_id in range(self.clusters))
+
+
+def split_shards(shard_count: int, clusters: int) -> List[List[int]]:
+    """Splits the shard ids as evenly as possible between the clusters."""
+    return [list(range(shard_count))[i::clusters] for i in range(clusters)]
@@ -24,17 +24,17 @@ SOFTWARE.
 
 from typing import Optional, Union, List
 
-import asyncpg
 import discord
 from discord.ext import commands
 
+from .db import InstrumentedPool
 from .embed import Embed
 from .menus import Confirm, Menu
 
 
 class Context(commands.Context):
     @property
-    def pool(self) -> asyncpg.pool.Pool:
+    def pool(self) -> InstrumentedPool:
         """Returns a PostgreSQL pool."""
         return self.bot.pool
 
@@ -0,0 +1,310 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Hashable, Optional, Set, Union
+
+import asyncpg
+
+from .breaker import CircuitBreaker
+from .errors import DatabaseUnavailable
+from .metrics import Histogram, timed
+from .loader import BatchLoader
+from .queries import Query, prepared
+
+
+log = logging.getLogger('pearl.db')
+
+
+class StatementStats:
+    __slots__ = ('count', 'errors', 'latency')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+
+class PreparedConnection(asyncpg.Connection):
+    """A connection holding the registered statements prepared."""
+
+    __slots__ = ('statements',)
+
+    async def prepare_registered(self) -> None:
+        """Prepares every registered statement, meant for the pool's ``init`` hook."""
+        self.statements = {query.name: await self.prepare(query.sql) for query in prepared()}
+
+
+class _AcquireContext:
+    def __init__(self, pool: 'InstrumentedPool', timeout: float = None):
+        self.pool = pool
+        self.timeout = timeout
+        self.connection = None
+
+    async def _acquire(self) -> asyncpg.Connection:
+        started = time.perf_counter()
+        source = self.pool._pool
+
+        self.connection = await source.acquire(timeout=self.timeout)
+        self.pool._sources[self.connection] = source
+        self.pool._record_acquire(time.perf_counter() - started)
+
+        return self.connection
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        return await self._acquire()
+
+    async def __aexit__(self, *_):
+        await self.pool.release(self.connection)
+
+
+class InstrumentedPool:
+    """Wraps an asyncpg pool to measure statements and connection waits.
+
+    Every statement gets its own count and latency histogram. The time spent
+    waiting for a free connection is measured too, and is used to grow or
+    shrink the pool between ``min_size`` and ``max_limit``.
+
+    Statements run through a circuit breaker and must finish, connection
+    wait included, within ``deadline`` seconds. Timeouts and connection
+    errors count as failures and are raised as ``DatabaseUnavailable``.
+    """
+
+    HIGH_WAIT = 5.0
+    LOW_WAIT = 0.5
+
+    def __init__(self, pool: asyncpg.pool.Pool, options: Dict[str, Any], *, max_limit: int,
+                 breaker: CircuitBreaker = None, deadline: float = None):
+        self._pool = pool
+        self._options = options
+        self._autoscale_task = None
+
+        # old pools still waiting for their connections to be released
+        self._closing: Set[asyncio.Task] = set()
+
+        self.breaker = breaker or CircuitBreaker('postgres')
+        self.deadline = deadline
+
+        self.max_limit = max_limit
+        self.max_size = options['max_size']
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.resizes = 0
+
+        # connections must go back to the pool they came from, even after a resize
+        self._sources: Dict[asyncpg.Connection, asyncpg.pool.Pool] = {}
+
+        self.statements: Dict[str, StatementStats] = {}
+        self.loaders: Dict[str, BatchLoader] = {}
+        self.acquire_wait = Histogram()
+        self._window_wait = Histogram()
+
+    @classmethod
+    async def create(cls, dsn: str, *, max_limit: int = None, breaker: CircuitBreaker = None,
+                     deadline: float = None, **options) -> 'InstrumentedPool':
+        options.setdefault('min_size', 10)
+        options.setdefault('max_size', 10)
+        options.setdefault('connection_class', PreparedConnection)
+
+        pool = await asyncpg.create_pool(dsn, **options)
+        return cls(pool, {'dsn': dsn, **options}, max_limit=max_limit or options['max_size'],
+                   breaker=breaker, deadline=deadline)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    def _record_acquire(self, elapsed: float) -> None:
+        elapsed *= 1000
+        self.acquire_wait.record(elapsed)
+        self._window_wait.record(elapsed)
+
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _record_statement(self, query: Union[Query, str], elapsed: float, failed: bool) -> None:
+        key = query.name if isinstance(query, Query) else ' '.join(query.split())
+
+        try:
+            stats = self.statements[key]
+        except KeyError:
+            stats = self.statements[key] = StatementStats()
+
+        stats.count += 1
+        stats.errors += failed
+        stats.latency.record(elapsed * 1000)
+
+    def acquire(self, *, timeout: float = None) -> _AcquireContext:
+        return _AcquireContext(self, timeout)
+
+    async def release(self, connection: asyncpg.Connection, *, timeout: float = None) -> None:
+        self.in_use -= 1
+        source = self._sources.pop(connection)
+        await source.release(connection, timeout=timeout)
+
+    @timed('db')
+    async def _run(self, method: str, query: Union[Query, str], *args, **kwargs) -> Any:
+        self.breaker.before_call()
+
+        try:
+            result = await asyncio.wait_for(self._execute(method, query, *args, **kwargs), self.deadline)
+        except (asyncio.TimeoutError, OSError, asyncpg.InterfaceError, asyncpg.PostgresConnectionError) as error:
+            self.breaker.record_failure()
+            raise DatabaseUnavailable() from error
+        except asyncpg.PostgresError:
+            # the server answered, so it's up even though the statement failed
+            self.breaker.record_success()
+            raise
+
+        self.breaker.record_success()
+        return result
+
+    async def _execute(self, method: str, query: Union[Query, str], *args, **kwargs) -> Any:
+        async with self.acquire() as connection:
+            statement = self._get_prepared(connection, method, query)
+            started = time.perf_counter()
+            failed = True
+            try:
+                if statement is None:
+                    result = await getattr(connection, method)(str(query), *args, **kwargs)
+                elif method == 'execute':
+                    await statement.fetch(*args, **kwargs)
+                    result = statement.get_statusmsg()
+                else:
+                    result = await getattr(statement, method)(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self._record_statement(query, time.perf_counter() - started, failed)
+
+    @staticmethod
+    def _get_prepared(connection: asyncpg.Connection, method: str,
+                      query: Union[Query, str]) -> Optional[asyncpg.prepared_stmt.PreparedStatement]:
+        if not isinstance(query, Query) or method == 'executemany':
+            return None
+
+        # connections opened without the init hook have no statements
+        statements = getattr(connection, 'statements', None) or {}
+        return statements.get(query.name)
+
+    async def execute(self, query: Union[Query, str], *args, timeout: float = None) -> str:
+        return await self._run('execute', query, *args, timeout=timeout)
+
+    async def executemany(self, query: Union[Query, str], args, *, timeout: float = None) -> None:
+        return await self._run('executemany', query, args, timeout=timeout)
+
+    async def fetch(self, query: Union[Query, str], *args, timeout: float = None) -> list:
+        return await self._run('fetch', query, *args, timeout=timeout)
+
+    async def fetchrow(self, query: Union[Query, str], *args, timeout: float = None) -> asyncpg.Record:
+        return await self._run('fetchrow', query, *args, timeout=timeout)
+
+    async def fetchval(self, query: Union[Query, str], *args, column: int = 0, timeout: float = None) -> Any:
+        return await self._run('fetchval', query, *args, column=column, timeout=timeout)
+
+    @timed('db')
+    async def load(self, query: Query, key: Hashable) -> Optional[asyncpg.Record]:
+        """Returns the key's row of a batch query, or ``None``.
+
+        Loads made in the same loop iteration share a single query. Each
+        caller's command is charged with the time it waited for its row.
+        """
+        try:
+            loader = self.loaders[query.name]
+        except KeyError:
+            loader = self.loaders[query.name] = BatchLoader(self, query)
+
+        # the future is shared, a cancelled caller must not cancel it for the others
+        return await asyncio.shield(loader.load(key))
+
+    async def resize(self, max_size: int) -> None:
+        """Replaces the underlying pool by one with the given maximum size.
+
+        The old pool is closed gracefully, waiting for its connections to be
+        released, while new acquires already go to the new pool. Its closing
+        outlives a cancelled resize, ``close`` waits for it.
+        """
+        options = {**self._options, 'max_size': max_size, 'min_size': min(self._options['min_size'], max_size)}
+        new_pool = asyncpg.create_pool(**options)
+        try:
+            await new_pool
+        except BaseException:
+            # a failed or cancelled pool may have opened some connections already
+            new_pool.terminate()
+            raise
+
+        old_pool, self._pool = self._pool, new_pool
+        log.info('Pool resized from %s to %s connections' % (self.max_size, max_size))
+
+        self.max_size = max_size
+        self.resizes += 1
+
+        task = asyncio.ensure_future(old_pool.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+        await asyncio.shield(task)
+
+    def start_autoscaling(self, *, interval: float = 60.0) -> None:
+        if self._autoscale_task is None:
+            self._autoscale_task = asyncio.ensure_future(self._autoscale(interval))
+
+    async def _autoscale(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+
+            wait = self._window_wait.percentile(95)
+            saturated = self.peak_in_use >= self.max_size
+            idle = self.peak_in_use <= self.max_size // 2
+            minimum = self._options['min_size']
+
+            self._window_wait.reset()
+            self.peak_in_use = self.in_use
+
+            try:
+                if wait > self.HIGH_WAIT and saturated and self.max_size < self.max_limit:
+                    await self.resize(min(self.max_size * 2, self.max_limit))
+                elif wait < self.LOW_WAIT and idle and self.max_size > minimum:
+                    await self.resize(max(self.max_size // 2, minimum))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep the current pool and try again next interval
+                log.exception('Could not resize the pool')
+
+    async def close(self) -> None:
+        if self._autoscale_task is not None:
+            self._autoscale_task.cancel()
+
+            # lets a cancelled resize terminate the pool it was creating
+            await asyncio.wait([self._autoscale_task])
+
+        if self._closing:
+            await asyncio.wait(self._closing)
+
+        await self._pool.close()
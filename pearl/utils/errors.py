@@ -109,12 +109,43 @@ class BotNotPlaying(MusicException):
         super().__init__('Nothing playing')
 
 
+class NodeUnavailable(MusicException):
+    def __init__(self):
+        super().__init__('No Lavalink node available')
+
+
 # TODO: Add docstring for this class.
 class ResponseError(CommandError):
     def __init__(self):
         super().__init__('Not OK response')
 
 
+class RateLimited(CommandError):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__('Rate limited, try again in %.2fs' % retry_after)
+
+
+class Overloaded(CommandError):
+    def __init__(self):
+        super().__init__('Too many commands running, try again later')
+
+
+class JobTimeout(CommandError):
+    def __init__(self):
+        super().__init__('Job took too long')
+
+
+class DatabaseUnavailable(CommandError):
+    def __init__(self):
+        super().__init__('Database is unavailable')
+
+
+class InvalidFont(CommandError):
+    def __init__(self):
+        super().__init__('Font not found')
+
+
 # TODO: Add docstring for this class.
 class SocialException(CommandError):
     pass
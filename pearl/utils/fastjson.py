@@ -0,0 +1,62 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import json
+import functools
+from typing import Any, Callable, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode('utf-8')
+
+
+def get_codec(backend: str = None) -> Tuple[str, Callable[[Any], str], Callable[[str], Any]]:
+    """Returns the name, ``dumps`` and ``loads`` of the fastest available backend.
+
+    A specific backend can be requested by name, which the benchmarks use
+    to compare them.
+    """
+    if backend in (None, 'orjson') and orjson is not None:
+        return 'orjson', _orjson_dumps, orjson.loads
+
+    if backend in (None, 'ujson') and ujson is not None:
+        return 'ujson', functools.partial(ujson.dumps, ensure_ascii=False), ujson.loads
+
+    if backend not in (None, 'json'):
+        raise ValueError(f'JSON backend {backend!r} is not available')
+
+    return 'json', functools.partial(json.dumps, separators=(',', ':'), ensure_ascii=False), json.loads
+
+
+BACKEND, dumps, loads = get_codec()
@@ -0,0 +1,392 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import time
+import asyncio
+import logging
+import functools
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+from discord.gateway import DiscordWebSocket, ReconnectWebSocket
+from discord.shard import Shard
+
+from . import fastjson
+
+
+log = logging.getLogger('pearl.gateway')
+
+# GatewayResumer reaches into these discord.py versions' internals, any other one must be checked first
+SUPPORTED_DISCORD_VERSIONS = ('1.5.1',)
+
+
+def _replace(items: List[dict], item: dict, key: str = 'id') -> None:
+    for index, existing in enumerate(items):
+        if existing[key] == item[key]:
+            items[index] = item
+            return
+    items.append(item)
+
+
+def _remove(items: List[dict], value: Any, key: str = 'id') -> None:
+    items[:] = [item for item in items if item[key] != value]
+
+
+class SessionStore:
+    """Keeps what a restarted process needs to RESUME its gateway sessions.
+
+    A RESUME only replays the events missed since the saved sequence, so a
+    new process would never learn about its guilds. The store follows the
+    raw gateway events to keep a journal of every guild's payload, without
+    members apart from the bot itself and without presences. It's saved to
+    disk with the sessions on shutdown and restored before resuming.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.user: Optional[dict] = None
+        self.guilds: Dict[str, dict] = {}
+
+    @property
+    def events(self) -> Tuple[str, ...]:
+        """The gateway events the journal follows."""
+        return tuple(name[4:].upper() for name in dir(self) if name.startswith('_on_'))
+
+    @property
+    def self_id(self) -> Optional[str]:
+        return self.user and self.user['id']
+
+    def handle(self, msg: Dict[str, Any]) -> None:
+        """Applies a raw gateway event to the journal."""
+        event, data = msg.get('t'), msg.get('d')
+        if event is None:
+            return
+
+        handler = getattr(self, f'_on_{event.lower()}', None)
+        if handler is not None:
+            handler(data)
+
+    def _on_ready(self, data: dict) -> None:
+        self.user = data['user']
+
+    def _on_guild_create(self, data: dict) -> None:
+        if data.get('unavailable'):
+            return
+
+        guild = {key: value for key, value in data.items() if key not in ('members', 'presences')}
+        guild['members'] = [member for member in data.get('members', ()) if member['user']['id'] == self.self_id]
+        self.guilds[data['id']] = guild
+
+    def _on_guild_update(self, data: dict) -> None:
+        guild = self.guilds.get(data['id'])
+        if guild is not None:
+            guild.update(data)
+
+    def _on_guild_delete(self, data: dict) -> None:
+        if not data.get('unavailable'):
+            self.guilds.pop(data['id'], None)
+
+    def _on_channel_create(self, data: dict) -> None:
+        guild = self.guilds.get(data.get('guild_id'))
+        if guild is not None:
+            _replace(guild.setdefault('channels', []), data)
+
+    _on_channel_update = _on_channel_create
+
+    def _on_channel_delete(self, data: dict) -> None:
+        guild = self.guilds.get(data.get('guild_id'))
+        if guild is not None:
+            _remove(guild.get('channels', []), data['id'])
+
+    def _on_guild_role_create(self, data: dict) -> None:
+        guild = self.guilds.get(data['guild_id'])
+        if guild is not None:
+            _replace(guild.setdefault('roles', []), data['role'])
+
+    _on_guild_role_update = _on_guild_role_create
+
+    def _on_guild_role_delete(self, data: dict) -> None:
+        guild = self.guilds.get(data['guild_id'])
+        if guild is not None:
+            _remove(guild.get('roles', []), data['role_id'])
+
+    def _on_guild_emojis_update(self, data: dict) -> None:
+        guild = self.guilds.get(data['guild_id'])
+        if guild is not None:
+            guild['emojis'] = data['emojis']
+
+    def _on_guild_member_update(self, data: dict) -> None:
+        guild = self.guilds.get(data['guild_id'])
+        if guild is None or data['user']['id'] != self.self_id:
+            return
+
+        for member in guild['members']:
+            member.update({key: value for key, value in data.items() if key != 'guild_id'})
+
+    def _on_voice_state_update(self, data: dict) -> None:
+        guild = self.guilds.get(data.get('guild_id'))
+        if guild is None:
+            return
+
+        voice_states = guild.setdefault('voice_states', [])
+        _remove(voice_states, data['user_id'], key='user_id')
+
+        if data.get('channel_id') is not None:
+            voice_states.append({key: value for key, value in data.items() if key != 'member'})
+
+    def save(self, sessions: Dict[int, Tuple[str, int]], shard_count: int) -> None:
+        """Writes the sessions and the journal to disk."""
+        payload = {
+            'saved_at': time.time(),
+            'shard_count': shard_count,
+            'sessions': {str(shard_id): [session_id, sequence] for shard_id, (session_id, sequence) in sessions.items()},
+            'user': self.user,
+            'guilds': list(self.guilds.values())
+        }
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        # written aside and renamed, so a crash never leaves half a file behind
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(fastjson.dumps(payload))
+        os.replace(temporary, self.path)
+
+    def load(self, *, shard_count: int, max_age: float) -> Optional[Dict[int, Tuple[str, int]]]:
+        """Reads and deletes the saved sessions, restoring the journal.
+
+        Returns ``None`` when there's nothing usable: no file, a file older
+        than ``max_age`` seconds, or one saved with another shard count.
+        """
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                payload = fastjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            log.warning('Ignoring the unreadable gateway sessions at %s' % self.path)
+            return None
+        finally:
+            # a session is resumed once at most, a stale file must not be tried again
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+        age = time.time() - payload['saved_at']
+        if age > max_age or payload['shard_count'] != shard_count or payload['user'] is None:
+            log.info('Ignoring gateway sessions saved %.0fs ago for %s shards' % (age, payload['shard_count']))
+            return None
+
+        self.user = payload['user']
+        self.guilds = {guild['id']: guild for guild in payload['guilds']}
+
+        return {int(shard_id): tuple(session) for shard_id, session in payload['sessions'].items()}
+
+
+def check_discord_version() -> None:
+    """Refuses to run the resume path on a discord.py it wasn't written against.
+
+    Its internals may have been renamed or changed, which would break the
+    gateway silently instead of failing here.
+    """
+    if discord.__version__ not in SUPPORTED_DISCORD_VERSIONS:
+        raise RuntimeError(
+            f'gateway_resume relies on discord.py {", ".join(SUPPORTED_DISCORD_VERSIONS)} internals, '
+            f'but {discord.__version__} is installed: check utils/gateway.py against it or disable gateway_resume'
+        )
+
+
+class GatewayResumer:
+    """Resumes an ``AutoShardedClient``'s shards with a previous process' sessions.
+
+    discord.py can only resume sessions it opened itself, so this is the
+    only place reaching into its internals: the client's shards and event
+    queue, and its state's guild, chunking and ready handling.
+
+    The journal keeps no members, so once a shard resumed, its guilds are
+    chunked in the background just like discord.py chunks them after an
+    IDENTIFY, unless ``chunk_guilds_at_startup`` is off, e.g. in lean mode.
+    """
+
+    def __init__(self, client: discord.AutoShardedClient, store: SessionStore):
+        check_discord_version()
+
+        self.client = client
+        self.store = store
+
+        self.sessions: Dict[int, Tuple[str, int]] = {}
+        self.resuming: Set[int] = set()
+        self.resumed: Set[int] = set()
+
+        # ids of the guilds restored from the journal, by shard
+        self.restored: Dict[int, List[int]] = {}
+        self._chunkers: Set[asyncio.Task] = set()
+
+    @property
+    def shards(self) -> Dict[int, Shard]:
+        return self.client._AutoShardedClient__shards
+
+    @property
+    def shard_ids(self) -> Iterable[int]:
+        return self.client.shard_ids or range(self.client.shard_count)
+
+    def restore(self, *, max_age: float) -> None:
+        """Loads the saved sessions and rebuilds the state they were saved with."""
+        sessions = self.store.load(shard_count=self.client.shard_count, max_age=max_age)
+        if not sessions:
+            return
+
+        shard_ids = set(self.shard_ids)
+        self.sessions = {shard_id: session for shard_id, session in sessions.items() if shard_id in shard_ids}
+
+        state = self.client._connection
+        state.user = discord.ClientUser(state=state, data=self.store.user)
+
+        for data in self.store.guilds.values():
+            shard_id = (int(data['id']) >> 22) % self.client.shard_count
+            if shard_id in self.sessions:
+                state._add_guild_from_data(data)
+                self.restored.setdefault(shard_id, []).append(int(data['id']))
+
+        log.info('Restored %s guilds to resume %s shards' % (len(self.client.guilds), len(self.sessions)))
+
+    async def resume(self, gateway: str, shard_id: int, *, initial: bool = False) -> bool:
+        """Resumes the shard's saved session, returning whether it has to identify instead.
+
+        The shard is only launched once Discord answered the RESUME, so a
+        refused session is identified before the next shard launches, just
+        like discord.py does on a cold boot. Otherwise discord.py would
+        consider every shard launched, mark the client as ready with the
+        first shard to identify and again with every later one.
+        """
+        saved = self.sessions.pop(shard_id, None)
+        if saved is None:
+            return True
+
+        session_id, sequence = saved
+        self.resuming.add(shard_id)
+
+        try:
+            coro = DiscordWebSocket.from_client(self.client, initial=initial, gateway=gateway, shard_id=shard_id,
+                                                session=session_id, sequence=sequence, resume=True)
+            ws = await asyncio.wait_for(coro, timeout=180.0)
+            await asyncio.wait_for(self._wait_resumed(ws), timeout=180.0)
+        except ReconnectWebSocket:
+            self.resuming.discard(shard_id)
+            log.info('Discord refused to resume shard %s, identifying instead' % shard_id)
+            return True
+        except Exception:
+            self.resuming.discard(shard_id)
+            log.exception('Could not resume shard %s, identifying instead' % shard_id)
+            return True
+
+        shard = self.shards[shard_id] = Shard(ws, self.client, self.client._AutoShardedClient__queue.put_nowait)
+        shard.launch()
+        return False
+
+    @staticmethod
+    async def _wait_resumed(ws: DiscordWebSocket) -> None:
+        """Reads the shard's events until RESUMED, the replayed ones are dispatched as usual.
+
+        Raises ``ReconnectWebSocket`` when the session was invalidated.
+        """
+        resumed = ws.wait_for('RESUMED', lambda data: True)
+
+        try:
+            while not resumed.done():
+                await ws.poll_event()
+        except BaseException:
+            await ws.close(code=1000)
+            raise
+
+    def shard_resumed(self, shard_id: int) -> bool:
+        """Records a resumed shard, returning whether it's one of the restored ones.
+
+        Resumed sessions never get READY, so the client is marked as ready
+        here, but only once every shard resumed: when some identified,
+        their READY makes discord.py mark it.
+        """
+        if shard_id not in self.resuming:
+            return False
+
+        self.resuming.discard(shard_id)
+        self.resumed.add(shard_id)
+
+        task = asyncio.ensure_future(self.chunk(shard_id))
+        self._chunkers.add(task)
+        task.add_done_callback(self._chunkers.discard)
+
+        if self.resumed.issuperset(self.shard_ids) and not self.client.is_ready():
+            self.client._connection.call_handlers('ready')
+            self.client.dispatch('ready')
+
+        return True
+
+    async def chunk(self, shard_id: int) -> None:
+        """Requests the members of the shard's restored guilds, one guild at a time.
+
+        discord.py's gateway rate limit paces the requests anyway, so they
+        aren't sent concurrently.
+        """
+        state = self.client._connection
+        started = time.perf_counter()
+        chunked = 0
+
+        for guild_id in self.restored.pop(shard_id, ()):
+            guild = self.client.get_guild(guild_id)
+            if guild is None or not state._guild_needs_chunking(guild):
+                continue
+
+            try:
+                await asyncio.wait_for(guild.chunk(), timeout=60.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception('Could not chunk guild %s of resumed shard %s' % (guild_id, shard_id))
+            else:
+                chunked += 1
+
+        if chunked:
+            log.info('Chunked %s guilds of resumed shard %s in %.2fs' % (chunked, shard_id, time.perf_counter() - started))
+
+    def save(self) -> int:
+        """Saves every shard's session so the next process can resume it, returning how many."""
+        sessions = {}
+
+        for shard_id, shard in self.shards.items():
+            ws = shard.ws
+            if ws is None or ws.session_id is None:
+                continue
+
+            sessions[shard_id] = (ws.session_id, ws.sequence)
+
+            # discord.py closes shards with 1000, which makes Discord drop the session
+            ws.close = functools.partial(self._close_resumable, ws.close)
+
+        self.store.save(sessions, self.client.shard_count)
+        return len(sessions)
+
+    @staticmethod
+    async def _close_resumable(close, code: int = None) -> None:
+        await close(code=4000)
@@ -0,0 +1,143 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import time
+import random
+import asyncio
+from typing import Dict
+
+import aiohttp
+
+from . import fastjson
+from .metrics import Histogram, add_time
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class HostStats:
+    __slots__ = ('requests', 'errors', 'latency')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+
+class HTTPMetrics:
+    """Request count, error count and latency of every host."""
+
+    def __init__(self):
+        self.hosts: Dict[str, HostStats] = {}
+
+    def get(self, host: str) -> HostStats:
+        try:
+            return self.hosts[host]
+        except KeyError:
+            stats = self.hosts[host] = HostStats()
+            return stats
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        async def on_request_start(session, context, params):
+            context.started = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            elapsed = time.perf_counter() - context.started
+            add_time('http', elapsed)
+
+            stats = self.get(params.url.host)
+            stats.requests += 1
+            stats.errors += params.response.status >= 500
+            stats.latency.record(elapsed * 1000)
+
+        async def on_request_exception(session, context, params):
+            elapsed = time.perf_counter() - context.started
+            add_time('http', elapsed)
+
+            stats = self.get(params.url.host)
+            stats.requests += 1
+            stats.errors += 1
+            stats.latency.record(elapsed * 1000)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+
+async def create_session(*, loop: asyncio.AbstractEventLoop, metrics: HTTPMetrics, limit: int = 100,
+                         limit_per_host: int = 10, dns_ttl: int = 300, keepalive: float = 30.0,
+                         timeout: float = 30.0, connect_timeout: float = 10.0) -> aiohttp.ClientSession:
+    """Creates the aiohttp session shared by every web request.
+
+    Connections are kept alive and pooled, at most ``limit_per_host`` of
+    them per host, DNS lookups are cached for ``dns_ttl`` seconds and every
+    request has a total and a connect timeout.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_ttl,
+        keepalive_timeout=keepalive,
+        loop=loop
+    )
+    client_timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=client_timeout,
+        json_serialize=fastjson.dumps,
+        trace_configs=[metrics.trace_config()],
+        loop=loop
+    )
+
+
+async def request(session: aiohttp.ClientSession, method: str, url: str, *, retries: int = 2,
+                  backoff: float = 0.5, **kwargs) -> aiohttp.ClientResponse:
+    """Makes a request, retrying idempotent ones on failures.
+
+    Connection errors, timeouts and 429/5xx responses are retried up to
+    ``retries`` times, sleeping a random time up to an exponential backoff
+    between attempts. The body is read before returning, so the response
+    can be used after the connection went back to the pool.
+    """
+    if method.upper() not in IDEMPOTENT_METHODS:
+        retries = 0
+
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                await response.read()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last_attempt:
+                raise
+        else:
+            if response.status not in RETRY_STATUSES or last_attempt:
+                return response
+
+        await asyncio.sleep(random.uniform(0, backoff * 2 ** attempt))
@@ -0,0 +1,193 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+import asyncpg
+
+from . import fastjson, queries
+from .errors import DatabaseUnavailable
+
+
+log = logging.getLogger('pearl.invalidation')
+
+CONNECTION_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError)
+
+
+class _Subscription:
+    __slots__ = ('evict', 'resync')
+
+    def __init__(self, evict: Callable[[Hashable], Any], resync: Callable[[], Awaitable[None]]):
+        self.evict = evict
+        self.resync = resync
+
+
+class CacheInvalidator:
+    """Keeps the caches of every process in sync over ``LISTEN``/``NOTIFY``.
+
+    A process writing to a cached table notifies the channel with the
+    table and the changed key, and every other process evicts that key.
+    The listener has a dedicated connection, checked every ``interval``
+    seconds. When it's lost, it reconnects with backoff and resyncs every
+    subscribed cache, as notifications sent in the meantime are gone.
+
+    It must be started before the caches are first filled, so no change
+    made while they load goes unnoticed.
+    """
+
+    def __init__(self, dsn: str, pool, *, channel: str = 'pearl_cache', interval: float = 10.0):
+        self.dsn = dsn
+        self.pool = pool
+        self.channel = channel
+        self.interval = interval
+
+        # notifications are delivered to the sender too, which already updated its cache
+        self.origin = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+        self.received = Counter()
+        self.reconnects = 0
+        self.resyncs = 0
+        self.connected = False
+
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._connection = None
+        self._task = None
+
+    def subscribe(self, table: str, evict: Callable[[Hashable], Any], *, resync: Callable[[], Awaitable[None]]) -> None:
+        """Registers how to evict one key of a table's cache and how to reload all of it."""
+        self._subscriptions[table] = _Subscription(evict, resync)
+
+    async def notify(self, table: str, key: Hashable) -> None:
+        """Tells the other processes the table's key has changed.
+
+        Failures are only logged, the write itself has already succeeded and
+        the other processes will catch up on their next resync.
+        """
+        payload = fastjson.dumps({'origin': self.origin, 'table': table, 'key': key})
+
+        try:
+            await self.pool.execute(queries.CACHE_NOTIFY, self.channel, payload)
+        except (DatabaseUnavailable, asyncpg.PostgresError):
+            log.warning('Could not notify the change of %s %r' % (table, key), exc_info=True)
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            data = fastjson.loads(payload)
+        except ValueError:
+            log.warning('Ignoring a malformed notification: %r' % payload)
+            return
+
+        if data.get('origin') == self.origin:
+            return
+
+        subscription = self._subscriptions.get(data.get('table'))
+        if subscription is None:
+            return
+
+        self.received[data['table']] += 1
+        subscription.evict(data['key'])
+
+    async def start(self) -> None:
+        """Starts listening, retrying in the background if the first connection fails.
+
+        The caches are resynced once it eventually connects.
+        """
+        if self._task is not None:
+            return
+
+        try:
+            await self._connect()
+        except CONNECTION_ERRORS:
+            log.warning('Could not connect the cache listener, retrying in the background')
+
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            await connection.add_listener(self.channel, self._on_notification)
+        except BaseException:
+            connection.terminate()
+            raise
+
+        self._connection = connection
+        self.connected = True
+
+    async def _disconnect(self) -> None:
+        self.connected = False
+        connection, self._connection = self._connection, None
+
+        if connection is not None and not connection.is_closed():
+            connection.terminate()
+
+    async def _resync(self) -> None:
+        self.resyncs += 1
+
+        for table, subscription in self._subscriptions.items():
+            try:
+                await subscription.resync()
+            except Exception:
+                log.exception('Could not resync the cache of %s' % table)
+
+    async def _run(self) -> None:
+        backoff = 1.0
+
+        while True:
+            # only the connection made by start listened before the caches were filled
+            if self._connection is None:
+                try:
+                    await self._connect()
+                except CONNECTION_ERRORS:
+                    log.warning('Could not connect the cache listener, retrying in %.0fs' % backoff)
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 60.0)
+                    continue
+
+                self.reconnects += 1
+                log.info('Cache listener connected, resyncing the caches')
+                await self._resync()
+
+            backoff = 1.0
+
+            try:
+                while True:
+                    await asyncio.sleep(self.interval)
+                    await self._connection.fetchval('SELECT 1', timeout=self.interval)
+            except CONNECTION_ERRORS:
+                log.warning('Cache listener connection lost')
+            finally:
+                await self._disconnect()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        await self._disconnect()
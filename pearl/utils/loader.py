@@ -0,0 +1,102 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import asyncio
+import contextvars
+from typing import Any, Dict, Hashable, List, Optional
+
+from .queries import Query
+
+
+class BatchLoader:
+    """Merges the single row lookups of one loop iteration into one query.
+
+    The first lookup schedules a flush for the end of the current iteration,
+    so every lookup made until then, by any command, is answered by a
+    single ``= ANY($1)`` query. The query returns the ``key`` column, used
+    to give each caller its row. Composite keys are tuples, sent as one
+    array per element. Keys without a row resolve to ``None``.
+
+    The query runs outside of any caller's context, callers time their own
+    wait for it instead.
+    """
+
+    def __init__(self, pool, query: Query):
+        if query.key is None:
+            raise ValueError(f'query {query.name!r} has no key column')
+
+        self.pool = pool
+        self.query = query
+
+        self.loads = 0
+        self.batches = 0
+
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def load(self, key: Hashable) -> 'asyncio.Future[Optional[Any]]':
+        """Returns a future for the key's row, sharing it with the same key's lookups."""
+        self.loads += 1
+
+        try:
+            return self._pending[key]
+        except KeyError:
+            pass
+
+        loop = asyncio.get_event_loop()
+        if not self._pending:
+            loop.call_soon(self._flush)
+
+        future = self._pending[key] = loop.create_future()
+        return future
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        self.batches += 1
+
+        # the batch belongs to no caller, e.g. its time would be charged to the first one's command
+        contextvars.Context().run(asyncio.ensure_future, self._dispatch(pending))
+
+    def _arguments(self, keys: List[Hashable]) -> tuple:
+        if isinstance(keys[0], tuple):
+            return tuple(map(list, zip(*keys)))
+        return (keys,)
+
+    def _key_of(self, record) -> Hashable:
+        value = record[self.query.key]
+        return tuple(value) if isinstance(value, list) else value
+
+    async def _dispatch(self, pending: Dict[Hashable, asyncio.Future]) -> None:
+        try:
+            records = await self.pool.fetch(self.query, *self._arguments(list(pending)))
+        except Exception as error:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        rows = {self._key_of(record): record for record in records}
+
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(rows.get(key))
@@ -0,0 +1,93 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import copy
+import logging
+import logging.handlers
+from datetime import datetime
+
+from . import fastjson
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as JSON lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.utcfromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+
+        return fastjson.dumps(data)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for a ``QueueListener``, keeping their traceback apart.
+
+    The default handler merges the traceback into the message, which leaves
+    no exception for ``JSONFormatter`` to fill. Here it's kept as the
+    record's ``exc_text``, which every formatter appends or uses as is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+
+        # the traceback holds the frames alive until the listener gets to it
+        record.exc_info = None
+        return record
+
+
+def create_file_handler(filename: str, *, max_bytes: int = 0, backup_count: int = 5,
+                        when: str = None) -> logging.Handler:
+    """Creates a rotating file handler.
+
+    Files are rotated by time when ``when`` is given (see
+    ``TimedRotatingFileHandler``), otherwise by size. The previous run's
+    file is rotated away on startup so each run starts with a fresh log.
+    """
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(filename, when=when, backupCount=backup_count,
+                                                            encoding='utf-8', delay=True)
+    else:
+        handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding='utf-8', delay=True)
+
+    if os.path.exists(filename) and os.path.getsize(filename):
+        handler.doRollover()
+
+    return handler
@@ -0,0 +1,67 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+from collections import OrderedDict
+from typing import Tuple
+
+import discord
+
+
+class MemberLRU:
+    """Keeps only the most recently seen members in the guilds' caches.
+
+    Used when the member cache is lean: members are added to their guild's
+    cache when they're seen and removed once they're the least recently
+    seen and the LRU is full. Members in voice are left to discord.py, which
+    caches them while they're connected.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.evictions = 0
+        self._members: 'OrderedDict[Tuple[int, int], discord.Guild]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def touch(self, member: discord.Member) -> None:
+        """Marks a member as recently seen, caching it if needed."""
+        guild = member.guild
+        key = (guild.id, member.id)
+
+        if key in self._members:
+            self._members.move_to_end(key)
+            return
+
+        guild._add_member(member)
+        self._members[key] = guild
+
+        while len(self._members) > self.capacity:
+            (_, member_id), guild = self._members.popitem(last=False)
+            self.evictions += 1
+
+            if member_id in guild._voice_states or member_id == guild._state.self_id:
+                continue
+
+            guild._remove_member(discord.Object(id=member_id))
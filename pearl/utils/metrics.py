@@ -0,0 +1,162 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import math
+import time
+import functools
+import contextvars
+from collections import Counter
+from typing import Dict, Optional, Callable, Awaitable
+
+
+class Histogram:
+    """A log-bucketed latency histogram, in the spirit of HDR histograms.
+
+    Values are grouped in buckets with a bounded relative error, so memory
+    stays constant no matter how many values are recorded. Values too small
+    to be told apart from zero are only counted.
+    """
+
+    ZERO = 1e-3
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.reset()
+
+    def reset(self) -> None:
+        self.buckets = Counter()
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        if value <= self.ZERO:
+            self.zeros += 1
+        else:
+            self.buckets[math.floor(math.log(value) / self._log_base)] += 1
+
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'Histogram') -> None:
+        self.buckets.update(other.buckets)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """Returns the value below which the given percentage of values fall."""
+        if not self.count:
+            return 0.0
+
+        threshold = self.count * percentile / 100
+        seen = self.zeros
+
+        if seen and seen >= threshold:
+            return 0.0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= threshold:
+                return min((1 + self.precision) ** (index + 1), self.max)
+
+        return self.max
+
+
+class Timing:
+    """Time spent by a single command invocation, split by where it went."""
+
+    __slots__ = ('started', 'db', 'http', 'discord')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.http = 0.0
+        self.discord = 0.0
+
+
+_current_timing = contextvars.ContextVar('timing', default=None)
+
+
+def start_timing() -> Timing:
+    """Starts timing the current task, which is usually a message's dispatch."""
+    timing = Timing()
+    _current_timing.set(timing)
+    return timing
+
+
+def current_timing() -> Optional[Timing]:
+    return _current_timing.get()
+
+
+def add_time(phase: str, elapsed: float) -> None:
+    """Adds the elapsed seconds to a phase of the current task's timing, if any."""
+    timing = _current_timing.get()
+    if timing is not None:
+        setattr(timing, phase, getattr(timing, phase) + elapsed)
+
+
+def timed(phase: str) -> Callable[[Callable[..., Awaitable]], Callable[..., Awaitable]]:
+    """Decorates a coroutine function so its time is added to the given phase."""
+    def decorator(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        @functools.wraps(func)
+        async def wrapped(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                add_time(phase, time.perf_counter() - started)
+        return wrapped
+    return decorator
+
+
+class CommandStats:
+    """Latency histograms of every command, in milliseconds."""
+
+    PHASES = ('total', 'db', 'http', 'discord')
+
+    def __init__(self):
+        self.commands: Dict[str, Dict[str, Histogram]] = {}
+
+    def record(self, command: str, timing: Timing) -> None:
+        try:
+            histograms = self.commands[command]
+        except KeyError:
+            histograms = self.commands[command] = {phase: Histogram() for phase in self.PHASES}
+
+        histograms['total'].record((time.perf_counter() - timing.started) * 1000)
+        histograms['db'].record(timing.db * 1000)
+        histograms['http'].record(timing.http * 1000)
+        histograms['discord'].record(timing.discord * 1000)
+
+    def reset(self) -> None:
+        self.commands.clear()
@@ -0,0 +1,146 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import List
+
+from .metrics import Histogram
+
+
+log = logging.getLogger('pearl.monitor')
+
+
+class SlowCallback:
+    __slots__ = ('when', 'duration', 'stack')
+
+    def __init__(self, stack: List[str]):
+        self.when = datetime.utcnow()
+        self.duration = None
+        self.stack = stack
+
+
+class LoopMonitor:
+    """Measures the event loop's lag and catches callbacks blocking it.
+
+    A task wakes up every ``interval`` seconds and records how late it was
+    woken up. A short callback ticks a heartbeat every few milliseconds and
+    a watchdog thread watches it: when the loop has gone ``threshold``
+    seconds past a missed tick, the loop's thread is stuck in a callback and
+    its stack is captured. The next tick records how long the loop went
+    without running, which is the blocking callback's duration give or take
+    a tick.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, interval: float = 0.25,
+                 threshold: float = 0.1, max_reports: int = 20):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.tick = min(interval, threshold / 4)
+
+        self.lag = Histogram()
+        self.current_lag = 0.0
+        self.reports = deque(maxlen=max_reports)
+        self.total_reports = 0
+
+        self._heartbeat = time.monotonic()
+        self._pending = None
+        self._handle = None
+        self._task = None
+        self._thread = None
+        self._running = False
+
+    def start(self) -> None:
+        """Starts monitoring, it must be called from the loop's thread."""
+        if self._running:
+            return
+
+        self._running = True
+        self._loop_thread = threading.get_ident()
+        self._task = self.loop.create_task(self._measure())
+        self._heartbeat = time.monotonic()
+        self._handle = self.loop.call_later(self.tick, self._tick)
+
+        self._thread = threading.Thread(target=self._watch, name='loop-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._task is not None:
+            self._task.cancel()
+        if self._handle is not None:
+            self._handle.cancel()
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+
+            await asyncio.sleep(self.interval)
+
+            self.current_lag = max(time.monotonic() - expected, 0.0) * 1000
+            self.lag.record(self.current_lag)
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+        blocked, self._heartbeat = now - self._heartbeat, now
+
+        report, self._pending = self._pending, None
+        if report is not None:
+            report.duration = blocked
+            log.warning('The loop was blocked for %.0fms:\n%s' % (blocked * 1000, ''.join(report.stack)))
+
+        if self._running:
+            self._handle = self.loop.call_later(self.tick, self._tick)
+
+    def _watch(self) -> None:
+        captured = None
+
+        while self._running:
+            time.sleep(self.tick)
+
+            heartbeat = self._heartbeat
+            if heartbeat == captured or time.monotonic() - heartbeat < self.tick + self.threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+
+            report = SlowCallback(traceback.format_stack(frame))
+            if self._heartbeat != heartbeat:
+                # the loop got unstuck while the stack was being captured
+                continue
+
+            self.reports.append(report)
+            self.total_reports += 1
+
+            self._pending = report
+            captured = heartbeat
@@ -0,0 +1,161 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import time
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Set, Tuple
+
+from .errors import Overloaded, JobTimeout
+from .metrics import Histogram
+
+
+def _call(func: Callable, args: tuple, kwargs: dict) -> Tuple[float, Any]:
+    # runs inside the worker, so the queue wait can be measured
+    return time.time(), func(*args, **kwargs)
+
+
+class PoolStats:
+    __slots__ = ('submitted', 'completed', 'failed', 'timed_out', 'rejected', 'pending', 'wait', 'latency')
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.pending = 0
+        self.wait = Histogram()
+        self.latency = Histogram()
+
+
+class Offloader:
+    """Runs blocking work away from the event loop.
+
+    IO-bound jobs run in a thread pool and CPU-bound jobs in a process pool,
+    so they don't hold the GIL the gateway needs. Each pool accepts a bounded
+    amount of pending jobs, refusing new ones with ``Overloaded``, and every
+    job has a timeout.
+
+    Jobs which time out keep running in their worker, as threads can't be
+    interrupted, and stay pending until they finish. A process pool with a
+    timed out job is replaced instead, its workers being killed once its
+    other jobs are done.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, *, threads: int = 8, processes: int = 2,
+                 max_pending: int = 64, timeout: float = 30.0):
+        self.loop = loop
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self.threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='offload')
+        self.processes = self._create_processes(processes)
+
+        self.stats = {'io': PoolStats(), 'cpu': PoolStats()}
+
+        # the jobs each executor is running, to know when a replaced one is idle
+        self._jobs: Dict[Executor, Set[Future]] = {}
+
+    @staticmethod
+    def _create_processes(workers: int) -> ProcessPoolExecutor:
+        # spawned workers don't inherit the bot's sockets and threads
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _finished(self, stats: PoolStats, jobs: Set[Future], job: Future) -> None:
+        # called from the worker's thread once the job really stopped, even after a timeout
+        def finish():
+            stats.pending -= 1
+            jobs.discard(job)
+
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(finish)
+
+    def _recycle_processes(self, stuck: Future) -> None:
+        old = self.processes
+        self.processes = self._create_processes(old._max_workers)
+        self.loop.create_task(self._retire(old, stuck))
+
+    async def _retire(self, executor: ProcessPoolExecutor, stuck: Future) -> None:
+        others = [job for job in self._jobs.pop(executor, ()) if job is not stuck]
+        if others:
+            await self.loop.run_in_executor(None, functools.partial(wait, others, timeout=self.timeout))
+
+        # a running job can only be stopped by killing its worker, which
+        # breaks the pool and fails the jobs still in it
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+
+        # the pool's manager thread must fail the jobs before it's shut down
+        await self.loop.run_in_executor(None, executor.shutdown)
+
+    async def _run(self, kind: str, executor, func: Callable, args: tuple, kwargs: dict, timeout: float) -> Any:
+        stats = self.stats[kind]
+
+        if stats.pending >= self.max_pending:
+            stats.rejected += 1
+            raise Overloaded()
+
+        submitted = time.time()
+        job = executor.submit(functools.partial(_call, func, args, kwargs))
+
+        stats.submitted += 1
+        stats.pending += 1
+        jobs = self._jobs.setdefault(executor, set())
+        jobs.add(job)
+        job.add_done_callback(functools.partial(self._finished, stats, jobs))
+
+        try:
+            started, result = await asyncio.wait_for(asyncio.wrap_future(job, loop=self.loop), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            stats.timed_out += 1
+            if executor is self.processes and not job.done():
+                self._recycle_processes(job)
+            raise JobTimeout()
+        except Exception:
+            stats.failed += 1
+            raise
+
+        stats.completed += 1
+        stats.wait.record(max(started - submitted, 0.0) * 1000)
+        stats.latency.record((time.time() - submitted) * 1000)
+
+        return result
+
+    async def run_io(self, func: Callable, *args, timeout: float = None, **kwargs) -> Any:
+        """Runs a blocking IO-bound function in the thread pool."""
+        return await self._run('io', self.threads, func, args, kwargs, timeout)
+
+    async def run_cpu(self, func: Callable, *args, timeout: float = None, **kwargs) -> Any:
+        """Runs a CPU-bound function in the process pool.
+
+        The function, its arguments and its result must be picklable.
+        """
+        return await self._run('cpu', self.processes, func, args, kwargs, timeout)
+
+    def shutdown(self) -> None:
+        self.threads.shutdown(wait=False)
+        self.processes.shutdown(wait=False)
@@ -0,0 +1,175 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import re
+import asyncio
+import functools
+import contextlib
+from typing import Dict, Iterator, Pattern
+
+import asyncpg
+
+from . import queries
+from .errors import DatabaseUnavailable
+
+
+GLOBAL_PREFIXES = ('pearl ', 'hey pearl pls ')
+
+
+@functools.lru_cache(maxsize=512)
+def compile_prefixes(prefix: str) -> Pattern:
+    """Returns a single regex matching the custom prefix and the global ones.
+
+    Guilds sharing the same custom prefix share the compiled pattern.
+    """
+    prefixes = sorted({prefix, *GLOBAL_PREFIXES}, key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, prefixes)))
+
+
+class PrefixCache:
+    """A write-through cache of guilds' custom prefixes.
+
+    Every guild's prefix is kept in memory so resolving a prefix doesn't
+    need to touch the pool. Concurrent misses for the same guild share a
+    single lookup. While the database is unavailable, cached prefixes keep
+    being served and misses fall back to the first global prefix.
+
+    Fills and lookups are merged into the cache, skipping the guilds which
+    were set or evicted while their query was running, as the query may
+    have read the row before that change.
+    """
+
+    def __init__(self, pool: asyncpg.pool.Pool):
+        self.pool = pool
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+        self._prefixes: Dict[int, str] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+
+        # generation of each guild's last write, only kept while queries are running
+        self._generation = 0
+        self._written: Dict[int, int] = {}
+        self._queries = 0
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._prefixes
+
+    def _written_since(self, guild_id: int, generation: int) -> bool:
+        return self._written.get(guild_id, 0) > generation
+
+    def _touch(self, guild_id: int) -> None:
+        if self._queries:
+            self._generation += 1
+            self._written[guild_id] = self._generation
+
+    @contextlib.contextmanager
+    def _query(self) -> Iterator[int]:
+        """Tracks the writes made while a query runs, yielding the generation it started at."""
+        self._queries += 1
+        try:
+            yield self._generation
+        finally:
+            self._queries -= 1
+            if not self._queries:
+                self._written.clear()
+
+    async def fill(self) -> None:
+        """Loads every guild's prefix with a single query."""
+        with self._query() as generation:
+            records = await self.pool.fetch(queries.PREFIX_ALL)
+            prefixes = {record['guild_id']: record['prefix'] for record in records}
+
+            for guild_id in list(self._prefixes):
+                if guild_id not in prefixes and not self._written_since(guild_id, generation):
+                    del self._prefixes[guild_id]
+
+            for guild_id, prefix in prefixes.items():
+                if not self._written_since(guild_id, generation):
+                    self._prefixes[guild_id] = prefix
+
+    async def get(self, guild_id: int) -> str:
+        """Returns the guild's prefix, querying it only on a miss."""
+        try:
+            prefix = self._prefixes[guild_id]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return prefix
+
+        self.misses += 1
+
+        future = self._pending.get(guild_id)
+        if future is None:
+            future = asyncio.ensure_future(self._load(guild_id))
+            self._pending[guild_id] = future
+            future.add_done_callback(functools.partial(self._forget, guild_id))
+
+        try:
+            return await asyncio.shield(future)
+        except DatabaseUnavailable:
+            self.fallbacks += 1
+            return GLOBAL_PREFIXES[0]
+
+    def _forget(self, guild_id: int, future: asyncio.Future) -> None:
+        # a write may have already replaced it with a newer lookup
+        if self._pending.get(guild_id) is future:
+            del self._pending[guild_id]
+
+    async def _load(self, guild_id: int) -> str:
+        with self._query() as generation:
+            fetch = await self.pool.fetchrow(queries.PREFIX_GET, guild_id)
+
+            if not fetch:
+                fetch = await self.pool.fetchrow(queries.PREFIX_INSERT, guild_id)
+
+            if not self._written_since(guild_id, generation):
+                self._prefixes[guild_id] = fetch['prefix']
+                self._touch(guild_id)
+
+        return fetch['prefix']
+
+    def dump(self) -> Dict[str, str]:
+        return {str(guild_id): prefix for guild_id, prefix in self._prefixes.items()}
+
+    def restore(self, prefixes: Dict[str, str]) -> None:
+        """Fills the cache from a snapshot, without touching the database."""
+        self._prefixes = {int(guild_id): prefix for guild_id, prefix in prefixes.items()}
+
+    def set(self, guild_id: int, prefix: str) -> None:
+        """Updates the cached prefix after it has been written to the database."""
+        self._prefixes[guild_id] = prefix
+        self._pending.pop(guild_id, None)
+        self._touch(guild_id)
+
+    def remove(self, guild_id: int) -> None:
+        """Evicts a guild from the cache."""
+        self._prefixes.pop(guild_id, None)
+        self._pending.pop(guild_id, None)
+        self._touch(guild_id)
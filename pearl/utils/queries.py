@@ -0,0 +1,99 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+from typing import Dict, Iterator
+
+
+class Query:
+    """A named SQL statement.
+
+    Statements with ``prepare`` set are prepared on every connection of the
+    pool as soon as it's opened, so running them skips parsing and planning.
+    Batch queries, meant for ``InstrumentedPool.load``, name the ``key``
+    column telling which lookup each row answers.
+    """
+
+    __slots__ = ('name', 'sql', 'prepare', 'key')
+
+    def __init__(self, name: str, sql: str, *, prepare: bool = True, key: str = None):
+        self.name = name
+        self.sql = ' '.join(sql.split())
+        self.prepare = prepare
+        self.key = key
+
+    def __str__(self) -> str:
+        return self.sql
+
+    def __repr__(self) -> str:
+        return f'<Query name={self.name!r} prepare={self.prepare}>'
+
+
+registry: Dict[str, Query] = {}
+
+
+def register(name: str, sql: str, *, prepare: bool = True, key: str = None) -> Query:
+    if name in registry:
+        raise ValueError(f'query {name!r} is already registered')
+
+    query = registry[name] = Query(name, sql, prepare=prepare, key=key)
+    return query
+
+
+def prepared() -> Iterator[Query]:
+    return (query for query in registry.values() if query.prepare)
+
+
+# settings
+PREFIX_ALL = register('prefix_all', 'SELECT guild_id, prefix FROM settings', prepare=False)
+PREFIX_GET = register('prefix_get', 'SELECT prefix FROM settings WHERE guild_id = $1')
+PREFIX_INSERT = register('prefix_insert', 'INSERT INTO settings (guild_id) VALUES ($1) RETURNING prefix')
+PREFIX_SET = register('prefix_set', 'UPDATE settings SET prefix = $2 WHERE guild_id = $1', prepare=False)
+SETTINGS_DELETE = register('settings_delete', 'DELETE FROM settings WHERE guild_id = $1', prepare=False)
+
+# notifies the other processes a cached row has changed
+CACHE_NOTIFY = register('cache_notify', 'SELECT pg_notify($1, $2)', prepare=False)
+
+# currency
+BANK_INSERT = register('bank_insert', 'INSERT INTO currency (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING')
+BANK_GET = register('bank_get', 'SELECT user_id, pearkies FROM currency WHERE user_id = ANY($1::bigint[])', key='user_id')
+BANK_ADD = register('bank_add', 'UPDATE currency SET pearkies = pearkies + $2 WHERE user_id = $1')
+
+# reminders
+TODO_INSERT = register('todo_insert', 'INSERT INTO todos (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING')
+TODO_GET = register('todo_get', 'SELECT user_id, list FROM todos WHERE user_id = ANY($1::bigint[])', key='user_id')
+TODO_APPEND = register('todo_append', 'UPDATE todos SET list = array_append(list, $2) WHERE user_id = $1')
+TODO_REMOVE = register('todo_remove', '''
+    UPDATE todos
+        SET list = list[:$2 - 1] || list[$2 + 1:]
+    WHERE user_id = $1
+''')
+TODO_CLEAR = register('todo_clear', 'DELETE FROM todos WHERE user_id = $1', prepare=False)
+
+# fun
+SHIP_GET = register('ship_get', '''
+    SELECT ships.* FROM ships
+        JOIN unnest($1::bigint[], $2::bigint[]) AS pairs (first_id, second_id)
+        ON ships.users = ARRAY[pairs.first_id, pairs.second_id]
+''', key='users')
+SHIP_INSERT = register('ship_insert', 'INSERT INTO ships VALUES ($1, $2, $3)')
@@ -0,0 +1,119 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import time
+from collections import OrderedDict, Counter
+from typing import Dict, Tuple, Hashable
+
+
+# (tokens, seconds) per command category, i.e. the cog's name
+DEFAULT_LIMITS = {
+    'Música': (5, 15.0),
+    'Diversão': (5, 10.0),
+    'Social': (5, 10.0),
+    'API': (3, 10.0),
+    None: (10, 10.0)
+}
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated', 'warned')
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.warned = False
+
+
+class RateLimiter:
+    """Token buckets keyed by category and by user or guild.
+
+    Buckets of keys which have been idle long enough to be full again are
+    evicted, so memory only grows with the amount of active keys.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]] = None, *, multiplier: int = 1):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.multiplier = multiplier
+        self.buckets: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+
+        self.allowed = Counter()
+        self.limited = Counter()
+
+    def get_limit(self, category: str) -> Tuple[int, float]:
+        rate, per = self.limits.get(category, self.limits[None])
+        return rate * self.multiplier, per
+
+    def _evict(self, now: float) -> None:
+        longest = max(per for _, per in self.limits.values())
+
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if now - bucket.updated < longest:
+                break
+
+            del self.buckets[key]
+
+    def hit(self, category: str, key: Hashable) -> Tuple[float, bool]:
+        """Takes a token from the bucket.
+
+        Returns how long to wait before retrying, which is zero when the
+        token was taken, and whether this is the first refusal since the
+        bucket was last allowed.
+        """
+        now = time.monotonic()
+        self._evict(now)
+
+        rate, per = self.get_limit(category)
+        bucket_key = (category, key)
+
+        try:
+            bucket = self.buckets[bucket_key]
+        except KeyError:
+            bucket = self.buckets[bucket_key] = TokenBucket(rate, now)
+        else:
+            self.buckets.move_to_end(bucket_key)
+            bucket.tokens = min(rate, bucket.tokens + (now - bucket.updated) * rate / per)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.warned = False
+            self.allowed[category] += 1
+            return 0.0, False
+
+        self.limited[category] += 1
+        first, bucket.warned = not bucket.warned, True
+
+        return (1 - bucket.tokens) * per / rate, first
+
+    def refund(self, category: str, key: Hashable) -> None:
+        """Gives back a token taken by ``hit``, e.g. when the command was refused elsewhere."""
+        bucket = self.buckets.get((category, key))
+        if bucket is None:
+            return
+
+        rate, _ = self.get_limit(category)
+        bucket.tokens = min(rate, bucket.tokens + 1)
+        self.allowed[category] -= 1
@@ -48,23 +48,31 @@ SOFTWARE.
 import re
 import asyncio
 import traceback
+from typing import List
 
 from discord.ext import commands
 
 from .menus import Menu
 from .constants import checkmark_emoji
 
-async def send_traceback(ctx: commands.Context, verbosity: int, *exception_info):
+def format_traceback(token: str, verbosity: int, *exception_info) -> List[str]:
     type_, value, trace = exception_info
-    
+
     content = ''.join(traceback.format_exception(type_, value, trace, verbosity))
-    content = content.replace('``', '`\u200b`').replace(ctx.bot.http.token, '[token omitted]')
+    content = content.replace('``', '`\u200b`').replace(token, '[token omitted]')
 
     paginator = commands.Paginator(prefix='```py')
     for line in content.split('\n'):
         paginator.add_line(line)
 
-    menu = Menu(paginator.pages)
+    return paginator.pages
+
+
+async def send_traceback(ctx: commands.Context, verbosity: int, *exception_info):
+    # tracebacks can't be pickled, so this runs in the thread pool
+    pages = await ctx.bot.offload.run_io(format_traceback, ctx.bot.http.token, verbosity, *exception_info)
+
+    menu = Menu(pages)
     await menu.start(ctx) 
 
 
@@ -0,0 +1,159 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import heapq
+import asyncio
+import itertools
+from collections import Counter
+from typing import Dict
+
+from .errors import Overloaded
+
+
+HIGH, NORMAL, LOW = range(3)
+
+# priority per command category, i.e. the cog's name
+DEFAULT_PRIORITIES = {
+    'Configurações': HIGH,
+    'Estatísticas': HIGH,
+    'Ajuda': HIGH,
+    'Desenvolvedores': HIGH,
+    'Música': NORMAL,
+    'Monetário': NORMAL,
+    'Lembretes': NORMAL,
+    'API': NORMAL,
+    'Meta': NORMAL,
+    'Diversão': LOW,
+    'Social': LOW
+}
+
+
+class _Slot:
+    def __init__(self, scheduler: 'CommandScheduler', priority: int):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    async def __aenter__(self):
+        await self.scheduler.acquire(self.priority)
+
+    async def __aexit__(self, *_):
+        self.scheduler.release()
+
+
+class CommandScheduler:
+    """Runs commands with bounded concurrency, highest priority first.
+
+    When every slot is busy, commands wait in a priority queue. Low priority
+    commands are shed when the queue is too deep or the loop is lagging, and
+    any command is refused once the queue is full.
+    """
+
+    def __init__(self, *, concurrency: int = 100, max_queue: int = 1000, shed_depth: int = 100,
+                 shed_lag: float = 250.0, priorities: Dict[str, int] = None, monitor=None):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.shed_depth = shed_depth
+        self.shed_lag = shed_lag
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.monitor = monitor
+
+        self.active = 0
+        self.dropped = Counter()
+        self.deferred = Counter()
+
+        self._queue = []
+        self._counter = itertools.count()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def get_priority(self, category: str) -> int:
+        return self.priorities.get(category, NORMAL)
+
+    def slot(self, category: str) -> _Slot:
+        """Returns an async context manager holding a slot while the command runs."""
+        return _Slot(self, self.get_priority(category))
+
+    def should_shed(self, priority: int) -> bool:
+        if self.depth >= self.max_queue:
+            return True
+
+        if priority < LOW:
+            return False
+
+        lagging = self.monitor is not None and self.monitor.current_lag >= self.shed_lag
+        return self.depth >= self.shed_depth or lagging
+
+    async def acquire(self, priority: int) -> None:
+        self._idle.clear()
+
+        if self.active < self.concurrency and not self._queue:
+            self.active += 1
+            return
+
+        if self.should_shed(priority):
+            self.dropped[priority] += 1
+            raise Overloaded()
+
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), future))
+        self.deferred[priority] += 1
+
+        # the slot is handed over by release, so it's already counted as active
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._check_idle()
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+
+        while self._queue and self.active < self.concurrency:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+
+            self.active += 1
+            future.set_result(None)
+
+        self._check_idle()
+
+    def _check_idle(self) -> None:
+        if not self.active and not any(not future.done() for *_, future in self._queue):
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Waits for the running and queued commands, returns whether they all finished in time."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
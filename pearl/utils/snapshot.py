@@ -0,0 +1,174 @@
+'''
+MIT License
+
+Copyright (c) 2020 Caio Alexandre
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import time
+import zlib
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from . import fastjson
+
+
+log = logging.getLogger('pearl.snapshot')
+
+# bumped whenever the file's layout changes, older files are then ignored
+FORMAT_VERSION = 1
+
+
+class _Entry:
+    __slots__ = ('dump', 'version', 'max_age', 'key')
+
+    def __init__(self, dump: Callable[[], Any], version: int, max_age: float, key: Optional[Callable[[], Any]]):
+        self.dump = dump
+        self.version = version
+        self.max_age = max_age
+        self.key = key
+
+
+class Snapshots:
+    """Keeps in-process caches warm across restarts.
+
+    Cogs register a cache by name with a function dumping it as JSON. Every
+    registered cache is written to a single compressed file on shutdown:
+    the caches are dumped on the loop by ``collect`` and only encoding and
+    writing them, by ``write``, may be offloaded.
+    On startup the file is read, but each cache is only decoded when its
+    owner asks for it with ``restore``. A cache is discarded when it's older
+    than its ``max_age``, when its ``version`` changed or when its ``key``,
+    e.g. the commit the bot runs, no longer matches.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.restored = 0
+        self.discarded = 0
+
+        self._entries: Dict[str, _Entry] = {}
+        self._saved: Dict[str, dict] = {}
+
+    def register(self, name: str, dump: Callable[[], Any], *, version: int = 1, max_age: float = 86400.0,
+                 key: Callable[[], Any] = None) -> None:
+        """Registers a cache, ``dump`` returns ``None`` when there's nothing to save."""
+        self._entries[name] = _Entry(dump, version, max_age, key)
+
+    def unregister(self, name: str) -> None:
+        self._entries.pop(name, None)
+
+    def load(self) -> None:
+        """Reads the file saved by the last process, without decoding the caches."""
+        try:
+            with open(self.path, 'rb') as f:
+                payload = fastjson.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return
+        except (zlib.error, ValueError):
+            log.warning('Ignoring the unreadable snapshot at %s' % self.path)
+            return
+
+        if payload.get('version') != FORMAT_VERSION:
+            log.info('Ignoring a snapshot with format version %s' % payload.get('version'))
+            return
+
+        self._saved = payload['entries']
+
+    def restore(self, name: str) -> Optional[Any]:
+        """Returns the saved cache, or ``None`` if it's missing or stale.
+
+        A cache is restored once at most, later calls return ``None``.
+        """
+        saved = self._saved.pop(name, None)
+        entry = self._entries.get(name)
+
+        if saved is None or entry is None:
+            return None
+
+        age = time.time() - saved['saved_at']
+        stale = age > entry.max_age or saved['version'] != entry.version
+        if not stale and entry.key is not None:
+            stale = saved['key'] != entry.key()
+
+        if stale:
+            self.discarded += 1
+            log.info('Discarded the stale snapshot of %s (%.0fs old)' % (name, age))
+            return None
+
+        self.restored += 1
+        return fastjson.loads(saved['data'])
+
+    def collect(self) -> Dict[str, dict]:
+        """Dumps every registered cache, it must run on the loop that owns them.
+
+        The dumps must return data that's no longer mutated, e.g. a copy, as
+        it's encoded later on by ``write``, possibly in another thread.
+        """
+        now = time.time()
+        entries = {}
+
+        for name, entry in self._entries.items():
+            try:
+                data = entry.dump()
+            except Exception:
+                log.exception('Could not dump the cache of %s' % name)
+                continue
+
+            if data is None:
+                continue
+
+            entries[name] = {
+                'saved_at': now,
+                'version': entry.version,
+                'key': entry.key() if entry.key is not None else None,
+                'data': data
+            }
+
+        return entries
+
+    def write(self, entries: Dict[str, dict]) -> None:
+        """Encodes the collected caches and writes them to disk, it's blocking."""
+        for saved in entries.values():
+            # encoded on its own, so restoring a cache doesn't decode the others
+            saved['data'] = fastjson.dumps(saved['data'])
+
+        # caches never restored nor filled again this time are carried over as they were
+        for name, saved in self._saved.items():
+            entries.setdefault(name, saved)
+
+        if not entries:
+            return
+
+        payload = fastjson.dumps({'version': FORMAT_VERSION, 'entries': entries}).encode('utf-8')
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(zlib.compress(payload))
+        os.replace(temporary, self.path)
+
+        log.info('Saved %s caches, %s bytes compressed' % (len(entries), os.path.getsize(self.path)))
+
+    def save(self) -> None:
+        """Dumps every registered cache to disk."""
+        self.write(self.collect())